@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from etl import PLATFORM_BITS
+
+sample_query = """
+SELECT year, month, price, metacritic_score, platform_mask, stratum_size
+FROM sample_game_sales;
+"""
+
+Z_95 = 1.96  # error bounds are 95% confidence intervals
+
+
+class Approximation:
+    """Approximate answers to the slice and dice query on the base tables.
+
+    Counts come from the stratified sample in sample_game_sales (strata are release months), rebuilt
+    by etl.py. Every estimate comes with the half-width of its 95% confidence interval in an extra
+    game_count_error column; the other columns match the SQL query in server.py.
+    """
+
+    def __init__(self, sample):
+        self.sample = sample
+        # strata numbered 0..n-1, with the population and sample size of each
+        strata = sample.groupby(['year', 'month'])
+        self.stratum = strata.ngroup().to_numpy()
+        self.stratum_size = strata['stratum_size'].first().to_numpy(dtype=np.float64)
+        self.stratum_sampled = strata.size().to_numpy(dtype=np.float64)
+        self.platform_mask = sample['platform_mask'].to_numpy(dtype=np.int64)
+        self.price = sample['price'].to_numpy(dtype=np.float64)
+        self.metacritic_score = sample['metacritic_score'].to_numpy(dtype=np.float64)
+
+    @classmethod
+    def from_sql(cls, warehouse):
+        sample = warehouse.read_frame(sample_query)
+        for column in ('price', 'metacritic_score'):
+            sample[column] = pd.to_numeric(sample[column])
+        return cls(sample)
+
+    def slice_dice(self, platform, price_range):
+        low, high = price_range
+        rows = (self.platform_mask & PLATFORM_BITS[platform]) != 0
+        prices = self.price[rows]
+        scores = self.metacritic_score[rows]
+
+        # same buckets as the SQL CASE expressions: missing prices and scores fall into the last one
+        price_bucket = np.select([prices < low, (prices >= low) & (prices < high)], [0, 1], 2)
+        score_bucket = np.select([scores < 50, (scores >= 50) & (scores < 75)], [0, 1], 2)
+        cells = price_bucket * 3 + score_bucket
+
+        # per stratum, the share of the month's sampled games in each cell, weighted up to the month's size;
+        # a month sampled in full contributes no sampling error
+        strata = len(self.stratum_size)
+        counts = np.bincount(self.stratum[rows] * 9 + cells, minlength=strata * 9).reshape(strata, 9)
+        size = self.stratum_size[:, None]
+        sampled = self.stratum_sampled[:, None]
+        share = counts / sampled
+        estimate = (size * share).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.where(sampled > 1, size ** 2 * (1 - sampled / size) * share * (1 - share) / (sampled - 1), 0.0)
+        error = Z_95 * np.sqrt(variance.sum(axis=0))
+
+        price_labels = [f'Under ${low}', f'${low} - ${high}', f'${high} and above']
+        score_labels = ['Low', 'Medium', 'High']
+        result = pd.DataFrame([
+            {'price_range': price_labels[cell // 3], 'metacritic_range': score_labels[cell % 3],
+             'game_count': round(estimate[cell]), 'game_count_error': error[cell]}
+            for cell in np.flatnonzero(estimate.round() > 0)
+        ], columns=['price_range', 'metacritic_range', 'game_count', 'game_count_error'])
+        return result.sort_values(['price_range', 'metacritic_range'], ignore_index=True)
+
+
+class ApproximateStore:
+    """Holds the current Approximation and reloads it whenever the ETL load version changes."""
+
+    def __init__(self, warehouse, version):
+        self.warehouse = warehouse
+        self.version = version  # callable returning the current load version; called on every get, so keep it cheap
+        self.loaded_version = None
+        self.approximation = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self.version()
+        with self._lock:
+            if self.approximation is None or version != self.loaded_version:
+                self.approximation = Approximation.from_sql(self.warehouse)
+                self.loaded_version = version
+            return self.approximation
@@ -0,0 +1,69 @@
+// figures for presentation-only switches, drawn in the browser from the aggregates in the dcc.Store
+// components, so toggling a metric or bar mode never goes back to the server
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    olap: {
+        drill_down_figure: function(data, metric, template) {
+            if (!data) {
+                return window.dash_clientside.no_update;
+            }
+            var gamesReleased = metric === 'games_released';
+            var yTitle = gamesReleased ? 'Games Released' : 'Avg Price';
+            var title = (gamesReleased ? 'Monthly Games Released' : 'Monthly Average Price') + ' (' + data.year + ')';
+            return {
+                data: [{
+                    type: 'bar',
+                    x: data.month,
+                    y: gamesReleased ? data.games_released : data.avg_price,
+                    name: yTitle
+                }],
+                layout: {
+                    template: template,
+                    title: {text: title},
+                    xaxis: {title: {text: 'Month'}},
+                    yaxis: {title: {text: yTitle}}
+                }
+            };
+        },
+
+        pivot_figure: function(data, view, template) {
+            if (!data) {
+                return window.dash_clientside.no_update;
+            }
+            // one trace per platform combination present, single platforms first, named from the mask's bits
+            var platforms = Object.keys(data.platforms);
+            var bitCount = function(mask) {
+                return platforms.filter(function(platform) { return mask & data.platforms[platform]; }).length;
+            };
+            var label = function(mask) {
+                var names = platforms.filter(function(platform) { return mask & data.platforms[platform]; });
+                if (names.length === platforms.length) {
+                    return 'all_platforms';
+                }
+                return names.length === 1 ? names[0] + '_only' : names.join('_');
+            };
+            var masks = data.platform_mask.filter(function(mask, index) {
+                return mask && data.platform_mask.indexOf(mask) === index;  // games on no platform aren't shown
+            });
+            masks.sort(function(a, b) { return bitCount(a) - bitCount(b) || a - b; });
+            return {
+                data: masks.map(function(mask) {
+                    var years = [], counts = [];
+                    data.platform_mask.forEach(function(rowMask, row) {
+                        if (rowMask === mask) {
+                            years.push(data.year[row]);
+                            counts.push(data.game_count[row]);
+                        }
+                    });
+                    return {type: 'bar', x: years, y: counts, name: label(mask)};
+                }),
+                layout: {
+                    template: template,
+                    title: {text: 'Games Released by Platform Combination'},
+                    xaxis: {title: {text: 'Year'}},
+                    yaxis: {title: {text: 'Number of Games'}},
+                    barmode: view
+                }
+            };
+        }
+    }
+});
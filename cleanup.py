@@ -1,57 +1,391 @@
 import json
+import os
 import re
+import shutil
 from datetime import datetime
+from operator import itemgetter
 
-def clean_game_data(json_file_path):
-    """Cleans and transforms game data from a JSON file, returning a list of dictionaries."""
+import numpy as np
+import pandas as pd
 
-    try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+# the only raw fields clean_game reads; everything else is skipped while streaming
+KEPT_FIELDS = frozenset([
+    'name', 'release_date', 'required_age', 'price', 'windows', 'mac', 'linux',
+    'metacritic_score', 'achievements', 'recommendations', 'positive', 'negative',
+    'estimated_owners', 'average_playtime_forever', 'peak_ccu'
+])
 
-        cleaned_games = []
+# integer fields, defaulting to 0 when missing
+INT_FIELDS = ['required_age', 'metacritic_score', 'achievements', 'recommendations',
+              'positive', 'negative', 'average_playtime_forever', 'peak_ccu']
+PLATFORM_FIELDS = ['windows', 'mac', 'linux']
 
-        for game_id, game_data in data.items():
-            cleaned_game = {}
-            cleaned_game['game_id'] = int(game_id)
-            cleaned_game['name'] = game_data.get('name')
+CLEANING_ENGINES = ('python', 'columnar')
+
+# what clean_game uses for a missing field; a field that is present but null is an error in every engine
+FIELD_DEFAULTS = {'price': 0.0, **{field: 0 for field in INT_FIELDS}}
+
+STREAM_CHUNK_SIZE = 64 * 1024  # characters read from the source file at a time
+
+# columns of a cleaned game, in clean_game's key order, and how the columnar format stores each one
+CLEANED_COLUMNS = [
+    ('game_id', '<i8'), ('name', 'utf8'), ('release_date', '<M8[D]'), ('required_age', '<i8'),
+    ('price', '<f8'), ('windows', '|b1'), ('mac', '|b1'), ('linux', '|b1'), ('metacritic_score', '<i8'),
+    ('achievements', '<i8'), ('recommendations', '<i8'), ('positive', '<i8'), ('negative', '<i8'),
+    ('estimated_owners_min', '<i8'), ('estimated_owners_max', '<i8'), ('average_playtime_forever', '<i8'),
+    ('peak_ccu', '<i8'),
+]
+COLUMNAR_SUFFIX = '.columns'  # output paths ending in this are written as a directory of column files
+COLUMNAR_BATCH_SIZE = 64 * 1024  # records converted to or from columns at a time
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_STRING_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR_RE = re.compile(r'[^,:{}\[\]" \t\n\r]+')  # numbers, true, false, null
+_KEY = r'"([^"\\]*(?:\\.[^"\\]*)*)"'
+_PRIMITIVE = r'"[^"\\]*(?:\\.[^"\\]*)*"|[^,:{}\[\]" \t\n\r]+'
+# a key with a string/scalar value; the value is left out for containers (or strings cut off by the buffer)
+_MEMBER_RE = re.compile(rf'[ \t\n\r]*{_KEY}[ \t\n\r]*:[ \t\n\r]*({_PRIMITIVE})?')
+_CONTAINER_RUN_RE = re.compile(r'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*')  # everything but brackets
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """Minimal incremental JSON reader over a text file, buffering one chunk at a time."""
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        # drop everything already consumed and append the next chunk
+        if self.eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, msg):
+        raise json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def _match(self, pattern):
+        # a match that fails or runs into the end of the buffer may just be cut off, so read on
+        while True:
+            match = pattern.match(self.buf, self.pos)
+            if (match is not None and match.end() < len(self.buf)) or not self._fill():
+                return match
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
 
+    def expect(self, char):
+        if self.peek() != char:
+            self._error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def next_item(self, closing):
+        """Consumes the separator after a member; returns False once the container is closed."""
+        char = self.peek()
+        if char == ',':
+            self.pos += 1
+            return True
+        if char == closing:
+            self.pos += 1
+            return False
+        self._error(f"Expecting ',' or '{closing}'")
+
+    def member(self):
+        """Reads an object key and, for strings and scalars, the raw value text (None otherwise)."""
+        match = self._match(_MEMBER_RE)
+        if match is None:
+            self._error("Expecting property name enclosed in double quotes")
+        key, value = match.groups()
+        if '\\' in key:
+            key = json.loads(f'"{key}"')
+        if value is None:
+            self.pos = match.end(1) + 1
+            self.expect(':')
+        else:
+            self.pos = match.end()
+        return key, value
+
+    def decode(self):
+        """Decodes the next value in full."""
+        char = self.peek()
+        if char not in ('{', '['):
+            match = self._match(_STRING_RE if char == '"' else _SCALAR_RE)
+            if match is None:
+                self._error("Expecting value")
+            self.pos = match.end()
+            return json.loads(match.group())
+
+        while True:
             try:
-                release_date_str = game_data.get('release_date')
-                if release_date_str:  # Check for not null/empty string
-                    cleaned_game['release_date'] = datetime.strptime(release_date_str, '%b %d, %Y').strftime('%Y-%m-%d')
-                else:
-                    continue  # skip game if release_date is null/missing
-            except ValueError:
-                continue  # skip game if the date format is invalid
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue  # value is cut off at the end of the buffer
+                raise
+            self.pos = end
+            return value
+
+    def skip(self):
+        """Skips over the next value without building it."""
+        char = self.peek()
+        if char not in ('{', '['):
+            match = self._match(_STRING_RE if char == '"' else _SCALAR_RE)
+            if match is None:
+                self._error("Expecting value")
+            self.pos = match.end()
+            return
+
+        depth = 0
+        while True:
+            self.pos = _CONTAINER_RUN_RE.match(self.buf, self.pos).end()
+            if self.pos == len(self.buf) or self.buf[self.pos] == '"':
+                # ran out of buffer, possibly in the middle of a string
+                if not self._fill():
+                    self._error("Unterminated value")
+                continue
+            if self.buf[self.pos] in '{[':
+                depth += 1
+            else:
+                depth -= 1
+            self.pos += 1
+            if depth == 0:
+                return
+
+
+def _skip_run_re(fields):
+    # any number of consecutive unwanted members with string/scalar values, consumed in one match
+    wanted = '|'.join(re.escape(field) for field in fields)
+    return re.compile(rf'(?:[ \t\n\r]*"(?!(?:{wanted})")[^"\\]*(?:\\.[^"\\]*)*"[ \t\n\r]*:[ \t\n\r]*'
+                      rf'(?:{_PRIMITIVE})[ \t\n\r]*,)*')
+
+
+def iter_raw_games(json_file_path, fields=KEPT_FIELDS, chunk_size=STREAM_CHUNK_SIZE):
+    """Walks the top-level {app_id: {...}} object one game at a time, yielding (game_id, fields) pairs.
+
+    Only the requested fields are decoded; all other values are skipped without being built.
+    """
+
+    skip_run = _skip_run_re(fields)
+
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect('{')
+        if stream.peek() == '}':
+            return
+
+        while True:
+            game_id, _ = stream.member()
+            stream.expect('{')
+            game_data = {}
+            if stream.peek() == '}':
+                stream.pos += 1
+            else:
+                while True:
+                    stream.pos = skip_run.match(stream.buf, stream.pos).end()
+                    key, value = stream.member()
+                    if key in fields:
+                        game_data[key] = json.loads(value) if value is not None else stream.decode()
+                    elif value is None:
+                        stream.skip()
+                    if not stream.next_item('}'):
+                        break
+
+            yield game_id, game_data
+
+            if not stream.next_item('}'):
+                break
+
+
+def clean_game(game_id, game_data):
+    """Cleans a single raw game record, returning None if the game should be skipped."""
+
+    cleaned_game = {}
+    cleaned_game['game_id'] = int(game_id)
+    cleaned_game['name'] = game_data.get('name')
+
+    try:
+        release_date_str = game_data.get('release_date')
+        if release_date_str:  # Check for not null/empty string
+            cleaned_game['release_date'] = datetime.strptime(release_date_str, '%b %d, %Y').strftime('%Y-%m-%d')
+        else:
+            return None  # skip game if release_date is null/missing
+    except ValueError:
+        return None  # skip game if the date format is invalid
+
+
+    cleaned_game['required_age'] = int(game_data.get('required_age', 0))  # default to 0
+    cleaned_game['price'] = float(game_data.get('price', 0.0))  # default to 0.0
+
+    # convert bool strings to actual booleans
+    for field in ['windows', 'mac', 'linux']:
+        cleaned_game[field] = game_data.get(field) == True # standardize as True/False, handle nulls
+
+    cleaned_game['metacritic_score'] = int(game_data.get('metacritic_score', 0))
+    cleaned_game['achievements'] = int(game_data.get('achievements', 0))
+    cleaned_game['recommendations'] = int(game_data.get('recommendations', 0))
+
+    cleaned_game['positive'] = int(game_data.get('positive', 0))
+    cleaned_game['negative'] = int(game_data.get('negative', 0))
+
+    # clean estimated owners by removing spaces and converting to a numeric range
+    estimated_owners = game_data.get('estimated_owners')
+    if estimated_owners:
+        match = re.match(r"(\d+) - (\d+)", estimated_owners)
+        if match:
+            cleaned_game['estimated_owners_min'] = int(match.group(1))
+            cleaned_game['estimated_owners_max'] = int(match.group(2))
+
+    cleaned_game['average_playtime_forever'] = int(game_data.get('average_playtime_forever', 0))
+    cleaned_game['peak_ccu'] = int(game_data.get('peak_ccu', 0))
+
+    return cleaned_game
+
+
+def skip_reason(game_data):
+    """Why clean_game skipped a raw game, for the run report."""
+    return 'invalid_release_date' if game_data.get('release_date') else 'missing_release_date'
+
+
+def iter_cleaned_games(json_file_path, skipped=None):
+    """Streams cleaned games from a JSON file one at a time, keeping memory flat regardless of input size.
+
+    The pure-Python parser is several times slower than json.load, so this is for inputs that don't
+    fit in memory; clean_game_data is the faster choice for anything that does.
+
+    If skipped is a Counter, it counts the games that were left out by skip_reason.
+    """
+
+    for game_id, game_data in iter_raw_games(json_file_path):
+        cleaned_game = clean_game(game_id, game_data)
+        if cleaned_game is not None:
+            yield cleaned_game
+        elif skipped is not None:
+            skipped[skip_reason(game_data)] += 1
+
+
+def _converted(values, convert):
+    """values as clean_game converts them: a column of nothing but the target type is taken as it is,
+    anything else goes through convert one value at a time."""
+    kind = pd.api.types.infer_dtype(values, skipna=False)
+    if kind == ('floating' if convert is float else 'integer'):
+        return values.tolist()
+    return list(map(convert, values.tolist()))
+
+
+def clean_games_columnar(raw_games, skipped=None):
+    """Cleans (game_id, game_data) pairs as whole columns instead of one dict at a time.
+
+    Produces the same records as clean_game: date parsing, owner-range splitting, bool
+    normalization and defaulting all run as vectorized pandas operations. Numbers go through int()
+    and float() just as in clean_game unless a column already holds nothing else, so a null raises
+    TypeError and a string like '1.5' in an integer field raises ValueError, as they do there.
+    """
+
+    raw_games = list(raw_games)
+    if not raw_games:
+        return []
+
+    # one pass over the records, transposed into columns; itemgetter is the fast path when no field is missing
+    fields = sorted(KEPT_FIELDS)
+    get_fields = itemgetter(*fields)
+
+    def row(game_data):
+        try:
+            return get_fields(game_data)
+        except KeyError:
+            return tuple(game_data.get(field, FIELD_DEFAULTS.get(field)) for field in fields)
 
+    rows = [row(game_data) for _, game_data in raw_games]
+    df = pd.DataFrame(dict(zip(fields, zip(*rows))), dtype=object)
+    df['game_id'] = pd.Series([game_id for game_id, _ in raw_games], dtype=object).astype('int64')
 
-            cleaned_game['required_age'] = int(game_data.get('required_age', 0))  # default to 0
-            cleaned_game['price'] = float(game_data.get('price', 0.0))  # default to 0.0
+    # skip games whose release_date is null/missing or not in the expected format
+    release_dates = pd.to_datetime(df['release_date'], format='%b %d, %Y', errors='coerce')
+    keep = release_dates.notna()
+    if skipped is not None:
+        for release_date in df.loc[~keep, 'release_date']:
+            skipped[skip_reason({'release_date': release_date})] += 1
+    df = df[keep]
+    release_dates = release_dates[keep]
 
-            # convert bool strings to actual booleans
-            for field in ['windows', 'mac', 'linux']:
-                cleaned_game[field] = game_data.get(field) == True # standardize as True/False, handle nulls
+    columns = {}
+    columns['game_id'] = df['game_id'].tolist()
+    columns['name'] = df['name'].tolist()
+    columns['release_date'] = release_dates.dt.strftime('%Y-%m-%d').tolist()
+    # in clean_game's order, so a record with more than one bad field raises the same error
+    for field in ['required_age', 'price'] + INT_FIELDS[1:]:
+        columns[field] = _converted(df[field], float if field == 'price' else int)
 
-            cleaned_game['metacritic_score'] = int(game_data.get('metacritic_score', 0))
-            cleaned_game['achievements'] = int(game_data.get('achievements', 0))
-            cleaned_game['recommendations'] = int(game_data.get('recommendations', 0))
+    # standardize as True/False, handle nulls
+    for field in PLATFORM_FIELDS:
+        columns[field] = (df[field] == True).tolist()
 
-            cleaned_game['positive'] = int(game_data.get('positive', 0))
-            cleaned_game['negative'] = int(game_data.get('negative', 0))
+    # split "min - max" owner ranges; there are only a few distinct buckets, so match each once
+    codes, buckets = pd.factorize(df['estimated_owners'], use_na_sentinel=False)
+    owners = pd.Series(buckets, dtype=object).str.extract(r'^(\d+) - (\d+)')
+    has_owners = owners[0].notna().to_numpy()[codes]
+    owners_min = pd.to_numeric(owners[0]).fillna(0).astype('int64').to_numpy()[codes].tolist()
+    owners_max = pd.to_numeric(owners[1]).fillna(0).astype('int64').to_numpy()[codes].tolist()
 
-            # clean estimated owners by removing spaces and converting to a numeric range
-            estimated_owners = game_data.get('estimated_owners')
-            if estimated_owners:
-                match = re.match(r"(\d+) - (\d+)", estimated_owners)
-                if match:
-                    cleaned_game['estimated_owners_min'] = int(match.group(1))
-                    cleaned_game['estimated_owners_max'] = int(match.group(2))
-            
-            cleaned_game['average_playtime_forever'] = int(game_data.get('average_playtime_forever', 0))
-            cleaned_game['peak_ccu'] = int(game_data.get('peak_ccu', 0))
+    # games without an owner range get no owner fields, like clean_game
+    keys = ('game_id', 'name', 'release_date', 'required_age', 'price', 'windows', 'mac', 'linux',
+            'metacritic_score', 'achievements', 'recommendations', 'positive', 'negative')
+    owner_keys = keys + ('estimated_owners_min', 'estimated_owners_max', 'average_playtime_forever', 'peak_ccu')
+    no_owner_keys = keys + ('average_playtime_forever', 'peak_ccu')
 
-            cleaned_games.append(cleaned_game)
+    cleaned_games = []
+    for row, has_owner, owner_min, owner_max, playtime, peak_ccu in zip(
+            zip(*(columns[key] for key in keys)), has_owners.tolist(), owners_min, owners_max,
+            columns['average_playtime_forever'], columns['peak_ccu']):
+        if has_owner:
+            cleaned_games.append(dict(zip(owner_keys, row + (owner_min, owner_max, playtime, peak_ccu))))
+        else:
+            cleaned_games.append(dict(zip(no_owner_keys, row + (playtime, peak_ccu))))
+
+    return cleaned_games
+
+
+def clean_game_data(json_file_path, engine='python', skipped=None):
+    """Cleans and transforms game data from a JSON file, returning a list of dictionaries.
+
+    engine='python' cleans one game dict at a time; engine='columnar' cleans whole columns at
+    once with clean_games_columnar. Both return identical records.
+    """
+
+    try:
+        if engine not in CLEANING_ENGINES:
+            raise ValueError(f"Unknown cleaning engine '{engine}'. Use one of {CLEANING_ENGINES}")
+
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if engine == 'columnar':
+            return clean_games_columnar(data.items(), skipped)
+
+        cleaned_games = []
+
+        for game_id, game_data in data.items():
+            cleaned_game = clean_game(game_id, game_data)
+            if cleaned_game is not None:
+                cleaned_games.append(cleaned_game)
+            elif skipped is not None:
+                skipped[skip_reason(game_data)] += 1
 
 
         return cleaned_games
@@ -62,34 +396,274 @@ def clean_game_data(json_file_path):
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
-    
-    
+
+
+def compare_engines(json_file_path):
+    """Cleans a file with every engine, streaming included, and returns how each result differs from python's.
+
+    Maps each other engine to a description of its first difference; an empty dict means they all agree,
+    including on raising the same kind of error.
+    """
+
+    def outcome(clean):
+        try:
+            return clean()
+        except Exception as e:
+            return type(e)
+
+    def python_engine():
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return [game for game in (clean_game(game_id, game_data) for game_id, game_data in data.items())
+                if game is not None]
+
+    def columnar_engine():
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            return clean_games_columnar(json.load(f).items())
+
+    def describe(result):
+        return result.__name__ if isinstance(result, type) else f"{len(result)} records"
+
+    expected = outcome(python_engine)
+    differences = {}
+    for engine, clean in (('columnar', columnar_engine), ('stream', lambda: list(iter_cleaned_games(json_file_path)))):
+        result = outcome(clean)
+        if result == expected:
+            continue
+        differences[engine] = f"{describe(result)} where python gave {describe(expected)}"
+        if isinstance(result, list) and isinstance(expected, list):
+            index = next((i for i, (a, b) in enumerate(zip(result, expected)) if a != b),
+                         min(len(result), len(expected)))
+            differences[engine] += f", first difference at record {index}"
+    return differences
+
+
+def write_columnar(cleaned_data, directory, batch_size=COLUMNAR_BATCH_SIZE):
+    """Writes cleaned games as one raw little-endian file per column plus a schema.json, in batches.
+
+    Fixed-width columns are plain arrays that can be memory-mapped as they are; strings are stored
+    as UTF-8 bytes with an offsets array. Each column also gets a validity array, since clean_game
+    leaves out some fields (the owner range) rather than writing nulls. Returns the number of rows.
+
+    Everything is written to a staging directory that replaces directory once complete, so a failed
+    write leaves the previous output as it was.
+    """
+
+    staging = f'{directory}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        rows = _write_columns(cleaned_data, staging, batch_size)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # a directory can only be renamed over an empty one, so the old output is moved aside first
+    if os.path.exists(directory):
+        previous = f'{directory}.old'
+        shutil.rmtree(previous, ignore_errors=True)
+        os.replace(directory, previous)
+        os.replace(staging, directory)
+        shutil.rmtree(previous)
+    else:
+        os.replace(staging, directory)
+    return rows
+
+
+def _write_columns(cleaned_data, directory, batch_size):
+    files = {}
+    for column, dtype in CLEANED_COLUMNS:
+        files[f'{column}.bin'] = open(os.path.join(directory, f'{column}.bin'), 'wb')
+        files[f'{column}.valid.bin'] = open(os.path.join(directory, f'{column}.valid.bin'), 'wb')
+        if dtype == 'utf8':
+            files[f'{column}.offsets.bin'] = open(os.path.join(directory, f'{column}.offsets.bin'), 'wb')
+    string_offsets = {column: 0 for column, dtype in CLEANED_COLUMNS if dtype == 'utf8'}
+
+    try:
+        for column in string_offsets:
+            np.zeros(1, dtype='<i8').tofile(files[f'{column}.offsets.bin'])
+
+        rows = 0
+        records = iter(cleaned_data)
+        while True:
+            batch = [record for _, record in zip(range(batch_size), records)]
+            if not batch:
+                break
+            rows += len(batch)
+            for column, dtype in CLEANED_COLUMNS:
+                values = [record.get(column) for record in batch]
+                np.array([value is not None for value in values]).tofile(files[f'{column}.valid.bin'])
+                if dtype == 'utf8':
+                    encoded = [(value or '').encode('utf-8') for value in values]
+                    lengths = np.fromiter(map(len, encoded), dtype='<i8', count=len(encoded))
+                    offsets = string_offsets[column] + np.cumsum(lengths)
+                    string_offsets[column] = int(offsets[-1])
+                    offsets.astype('<i8').tofile(files[f'{column}.offsets.bin'])
+                    files[f'{column}.bin'].write(b''.join(encoded))
+                else:
+                    missing = 'NaT' if dtype.startswith('<M8') else 0
+                    np.array([missing if value is None else value for value in values], dtype=dtype) \
+                        .tofile(files[f'{column}.bin'])
+    finally:
+        for f in files.values():
+            f.close()
+
+    # written last, so a directory without one is an unfinished write
+    with open(os.path.join(directory, 'schema.json'), 'w') as f:
+        json.dump({'rows': rows, 'columns': dict(CLEANED_COLUMNS)}, f, indent=4)
+    return rows
+
+
+def _map_column(directory, file_name, dtype, count):
+    if count == 0:
+        return np.empty(0, dtype=dtype)  # mmap can't map an empty file
+    return np.memmap(os.path.join(directory, file_name), dtype=dtype, mode='r', shape=(count,))
+
+
+def iter_columnar_games(directory, batch_size=COLUMNAR_BATCH_SIZE):
+    """Streams cleaned games back out of a write_columnar directory.
+
+    The column files are memory-mapped, so only the batch being converted is ever read into
+    memory. Yields the same dicts as clean_game, absent fields included.
+    """
+
+    with open(os.path.join(directory, 'schema.json'), 'r') as f:
+        schema = json.load(f)
+    rows = schema['rows']
+
+    columns = {}
+    for column, dtype in schema['columns'].items():
+        valid = _map_column(directory, f'{column}.valid.bin', '|b1', rows)
+        if dtype == 'utf8':
+            offsets = _map_column(directory, f'{column}.offsets.bin', '<i8', rows + 1)
+            data = _map_column(directory, f'{column}.bin', '|u1', int(offsets[-1]))
+            columns[column] = (dtype, data, offsets, valid)
+        else:
+            columns[column] = (dtype, _map_column(directory, f'{column}.bin', dtype, rows), None, valid)
+    names = list(columns)
+
+    for start in range(0, rows, batch_size):
+        end = min(start + batch_size, rows)
+        values, missing = [], []
+        for column, (dtype, data, offsets, valid) in columns.items():
+            if dtype == 'utf8':
+                bounds = offsets[start:end + 1] - offsets[start]
+                blob = data[offsets[start]:offsets[end]].tobytes()
+                values.append([blob[a:b].decode('utf-8') for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())])
+            elif dtype.startswith('<M8'):
+                values.append(np.datetime_as_string(data[start:end], unit='D').tolist())
+            else:
+                values.append(data[start:end].tolist())
+            batch_valid = valid[start:end]
+            if not batch_valid.all():
+                missing.append((column, batch_valid.tolist()))
+
+        for index, row in enumerate(zip(*values)):
+            game = dict(zip(names, row))
+            for column, column_valid in missing:
+                if not column_valid[index]:
+                    if column == 'name':
+                        game[column] = None  # clean_game keeps a missing name as None
+                    else:
+                        del game[column]
+            yield game
+
+
 def write_cleaned_data_to_file(cleaned_data, output_file_path):
-    """Writes the cleaned game data to a file (JSON or CSV)."""
+    """Writes the cleaned game data to a file (JSON or CSV), or to a columnar directory (see write_columnar).
+
+    cleaned_data may be a list or any iterable of records, e.g. iter_cleaned_games, and is written
+    one record at a time so the whole dataset never has to be held in memory. Errors are raised, so
+    a failed write never looks like a finished one.
+    """
 
+    if output_file_path.endswith(COLUMNAR_SUFFIX):
+        # typed binary columns that etl.py memory-maps instead of parsing
+        write_columnar(cleaned_data, output_file_path)
+        print(f"Cleaned data written to {output_file_path}")
+        return
+    if not output_file_path.endswith(('.json', '.csv')):
+        raise ValueError(f"Unsupported file format. Please use .json, .csv or {COLUMNAR_SUFFIX}")
+
+    # written next to the output and renamed over it once complete, like write_columnar
+    staging = f'{output_file_path}.tmp'
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as outfile:
+        with open(staging, 'w', encoding='utf-8') as outfile:
             if output_file_path.endswith('.json'):
-                json.dump(cleaned_data, outfile, indent=4) # write as JSON
-            elif output_file_path.endswith('.csv'):
+                # write as JSON, same layout as json.dump(indent=4)
+                outfile.write('[')
+                count = 0
+                for record in cleaned_data:
+                    outfile.write(',\n    ' if count else '\n    ')
+                    outfile.write(json.dumps(record, indent=4).replace('\n', '\n    '))
+                    count += 1
+                outfile.write('\n]' if count else ']')
+            else:
                 # write as CSV
                 import csv
-                fieldnames = cleaned_data[0].keys() # get column headers
+                records = iter(cleaned_data)
+                first = next(records, None)
+                if first is None:
+                    raise ValueError("No cleaned games to write")
+                fieldnames = first.keys() # get column headers
                 writer = csv.DictWriter(outfile, fieldnames=fieldnames)
                 writer.writeheader()
-                writer.writerows(cleaned_data)                
-            else:
-                raise ValueError("Unsupported file format. Please use .json or .csv")
-        print(f"Cleaned data written to {output_file_path}")
+                writer.writerow(first)
+                writer.writerows(records)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+    os.replace(staging, output_file_path)
+    print(f"Cleaned data written to {output_file_path}")
 
-    except Exception as e:
-        print(f"Error writing to file: {e}")
-        
 
 if __name__ == "__main__":
-    json_file_path = 'dataset/games.json'
-    output_file_path = 'dataset/cleaned_games.json'
-    cleaned_data = clean_game_data(json_file_path)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Clean the raw Steam games dataset.")
+    parser.add_argument('--input', default='dataset/games.json')
+    parser.add_argument('--output', default='dataset/cleaned_games.json')
+    parser.add_argument('--engine', choices=CLEANING_ENGINES + ('stream',), default='python',
+                        help="python (default) and columnar parse the whole file with json.load and clean it "
+                             "in memory; stream reads one game at a time with flat memory, for inputs too large "
+                             "to load, but parses several times slower")
+    parser.add_argument('--check-engines', action='store_true',
+                        help="clean --input with every engine and check that they agree, writing nothing")
+    parser.add_argument('--report', default='dataset/cleanup_report.json', help="where to write the JSON run report")
+    parser.add_argument('--profile', help="write cProfile stats for the whole run to this file")
+    parser.add_argument('--trace-memory', action='store_true', help="record each stage's tracemalloc peak")
+    args = parser.parse_args()
+
+    if args.check_engines:
+        differences = compare_engines(args.input)
+        for engine, difference in differences.items():
+            print(f"{engine} differs from python: {difference}")
+        if differences:
+            raise SystemExit(1)
+        print(f"All cleaning engines agree on {args.input}")
+        raise SystemExit(0)
 
-    if cleaned_data:
-        write_cleaned_data_to_file(cleaned_data, output_file_path)
+    from run_report import RunReport, profiled
+
+    report = RunReport('cleanup', vars(args), trace_memory=args.trace_memory)
+    try:
+        with profiled(args.profile):
+            if args.engine == 'stream':
+                with report.stage('clean_and_write') as stage:
+                    cleaned_games = iter_cleaned_games(args.input, skipped=stage.skipped)
+                    write_cleaned_data_to_file(stage.track(cleaned_games), args.output)
+                    stage.counts['parsed'] = stage.records + sum(stage.skipped.values())
+            else:
+                with report.stage('clean') as stage:
+                    cleaned_data = clean_game_data(args.input, engine=args.engine, skipped=stage.skipped)
+                    if cleaned_data is None:
+                        raise SystemExit(1)  # clean_game_data has printed why
+                    stage.records = len(cleaned_data)
+                    stage.counts['parsed'] = stage.records + sum(stage.skipped.values())
+                if cleaned_data:
+                    with report.stage('write') as stage:
+                        write_cleaned_data_to_file(stage.track(cleaned_data, total=len(cleaned_data)), args.output)
+    finally:
+        # a failed run still gets its report, with the stage that failed marked as such
+        report.write(args.report)
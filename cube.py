@@ -0,0 +1,209 @@
+import os
+import shutil
+import tempfile
+import threading
+try:
+    import fcntl
+except ImportError:  # Windows; the pre-forking server that shares cubes doesn't run there anyway
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from etl import PLATFORM_BITS
+
+# one denormalized row per fact row, with just the columns the dashboard aggregates
+snapshot_query = """
+SELECT
+    fgs.game_key,
+    dt.year,
+    dt.month,
+    dg.price,
+    dg.metacritic_score,
+    fgs.platform_mask,
+    fgs.recommendations
+FROM
+    fact_game_sales fgs
+JOIN dim_game dg ON fgs.game_key = dg.game_key
+JOIN dim_time dt ON fgs.time_key = dt.time_key;
+"""
+
+# the arrays an OlapCube is built from, each saved as its own .npy file
+CUBE_ARRAYS = ('year', 'month', 'price', 'metacritic_score', 'recommendations', 'platform_mask')
+
+PLATFORM_MASKS = 1 << len(PLATFORM_BITS)  # distinct platform_mask values
+
+
+class OlapCube:
+    """In-memory columnar snapshot of the star schema.
+
+    Answers the roll up, drill down, slice and dice and pivot queries with NumPy bincounts over
+    plain arrays and returns DataFrames with the same columns as the SQL queries in server.py.
+    """
+
+    def __init__(self, year, month, price, metacritic_score, recommendations, platform_mask):
+        self.size = len(year)
+        self.year = year
+        self.month = month
+        self.price = price
+        self.metacritic_score = metacritic_score
+        self.recommendations = recommendations
+        self.platform_mask = platform_mask
+        self.min_year = int(self.year.min()) if self.size else 0
+        self.year_span = int(self.year.max()) - self.min_year + 1 if self.size else 1
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(
+            year=snapshot['year'].to_numpy(dtype=np.int64),
+            month=snapshot['month'].to_numpy(dtype=np.int64),
+            price=pd.to_numeric(snapshot['price']).to_numpy(dtype=np.float64),
+            metacritic_score=pd.to_numeric(snapshot['metacritic_score']).to_numpy(dtype=np.float64),
+            recommendations=pd.to_numeric(snapshot['recommendations']).fillna(0).to_numpy(dtype=np.float64),
+            platform_mask=snapshot['platform_mask'].to_numpy(dtype=np.int64),
+        )
+
+    @classmethod
+    def from_sql(cls, warehouse):
+        return cls.from_snapshot(warehouse.read_frame(snapshot_query))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in CUBE_ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory):
+        """Maps a saved cube read-only, so every process that loads it shares the same page cache pages."""
+        return cls(**{name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r').view(np.ndarray)
+                      for name in CUBE_ARRAYS})
+
+    def _year_range(self, start_year, end_year):
+        return (self.year >= start_year) & (self.year <= end_year)
+
+    def roll_up(self, start_year, end_year):
+        rows = self._year_range(start_year, end_year)
+        year_index = self.year[rows] - self.min_year
+        scores = self.metacritic_score[rows]
+        scored = ~np.isnan(scores)
+
+        games = np.bincount(year_index, minlength=self.year_span)
+        score_sum = np.bincount(year_index[scored], weights=scores[scored], minlength=self.year_span)
+        score_count = np.bincount(year_index[scored], minlength=self.year_span)
+        recommendations = np.bincount(year_index, weights=self.recommendations[rows], minlength=self.year_span)
+
+        present = games > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_score = np.where(score_count > 0, score_sum / score_count, np.nan)
+        return pd.DataFrame({
+            'year': np.flatnonzero(present) + self.min_year,
+            'avg_metacritic_score': avg_score[present],
+            'total_recommendations': recommendations[present].astype(np.int64),
+        })
+
+    def drill_down(self, year):
+        rows = self.year == year
+        months = self.month[rows]
+        prices = self.price[rows]
+        priced = ~np.isnan(prices)
+
+        # game_key is the fact table's primary key, so counting rows counts distinct games
+        games = np.bincount(months, minlength=13)
+        price_sum = np.bincount(months[priced], weights=prices[priced], minlength=13)
+        price_count = np.bincount(months[priced], minlength=13)
+
+        present = games > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_price = np.where(price_count > 0, price_sum / price_count, np.nan)
+        month_values = np.flatnonzero(present)
+        return pd.DataFrame({
+            'year': np.full(len(month_values), year, dtype=np.int64),
+            'month': month_values,
+            'games_released': games[present],
+            'avg_price': avg_price[present],
+        })
+
+    def slice_dice(self, platform, price_range):
+        low, high = price_range
+        rows = (self.platform_mask & PLATFORM_BITS[platform]) != 0
+        prices = self.price[rows]
+        scores = self.metacritic_score[rows]
+
+        # NaN comparisons are False, so missing prices and scores fall into the last bucket like SQL's ELSE
+        price_bucket = np.select([prices < low, (prices >= low) & (prices < high)], [0, 1], 2)
+        score_bucket = np.select([scores < 50, (scores >= 50) & (scores < 75)], [0, 1], 2)
+        counts = np.bincount(price_bucket * 3 + score_bucket, minlength=9)
+
+        price_labels = [f'Under ${low}', f'${low} - ${high}', f'${high} and above']
+        score_labels = ['Low', 'Medium', 'High']
+        result = pd.DataFrame([
+            {'price_range': price_labels[cell // 3], 'metacritic_range': score_labels[cell % 3],
+             'game_count': int(counts[cell])}
+            for cell in np.flatnonzero(counts)
+        ], columns=['price_range', 'metacritic_range', 'game_count'])
+        return result.sort_values(['price_range', 'metacritic_range'], ignore_index=True)
+
+    def pivot(self, start_year, end_year):
+        rows = self._year_range(start_year, end_year)
+        cells = (self.year[rows] - self.min_year) * PLATFORM_MASKS + self.platform_mask[rows]
+        counts = np.bincount(cells, minlength=self.year_span * PLATFORM_MASKS)
+
+        present = np.flatnonzero(counts)
+        return pd.DataFrame({
+            'year': present // PLATFORM_MASKS + self.min_year,
+            'platform_mask': present % PLATFORM_MASKS,
+            'game_count': counts[present],
+        })
+
+
+class CubeStore:
+    """Holds the current OlapCube and reloads its snapshot whenever the ETL load version changes.
+
+    With a shared_dir, each version is saved there once and memory-mapped, so the worker processes
+    of a pre-forking server share one copy of the arrays instead of each querying its own.
+    """
+
+    def __init__(self, warehouse, version, shared_dir=None):
+        self.warehouse = warehouse
+        self.version = version  # callable returning the current load version; called on every get, so keep it cheap
+        self.shared_dir = shared_dir
+        self.loaded_version = None
+        self.cube = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self.version()
+        with self._lock:
+            if self.cube is None or version != self.loaded_version:
+                self.cube = self._load(version)
+                self.loaded_version = version
+            return self.cube
+
+    def _load(self, version):
+        if self.shared_dir is None:
+            return OlapCube.from_sql(self.warehouse)
+
+        name = f'cube-{version}'
+        path = os.path.join(self.shared_dir, name)
+        if not os.path.isdir(path):
+            os.makedirs(self.shared_dir, exist_ok=True)
+            # workers that start together wait for one of them to build the version instead of all querying
+            with open(os.path.join(self.shared_dir, 'build.lock'), 'w') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                if not os.path.isdir(path):
+                    self._publish(path)
+        return OlapCube.load(path)
+
+    def _publish(self, path):
+        # build in a private directory and rename it into place, so no process maps a half-written cube
+        staging = tempfile.mkdtemp(dir=self.shared_dir)
+        OlapCube.from_sql(self.warehouse).save(staging)
+        try:
+            os.rename(staging, path)
+        except OSError:  # another process published this version first
+            shutil.rmtree(staging, ignore_errors=True)
+        # processes still mapping an older version keep their pages after the files are unlinked
+        for entry in os.listdir(self.shared_dir):
+            if entry.startswith('cube-') and entry != os.path.basename(path):
+                shutil.rmtree(os.path.join(self.shared_dir, entry), ignore_errors=True)
@@ -1,67 +1,998 @@
+import argparse
+import hashlib
 import json
+import math
+import os
+import queue
+import threading
+import time
 import mysql.connector
-from datetime import datetime
-
-# Load JSON data
-with open('dataset/cleaned_games.json', 'r') as file:
-    game_data = json.load(file)
-
-# Connect to MySQL database
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="rootpassword",
-    database="steam_games_data_warehouse"
-)
-cursor = db.cursor()
-
-def etl_process(data):
+import pandas as pd
+from datetime import date, datetime
+from itertools import islice
+
+from cleanup import COLUMNAR_SUFFIX, iter_columnar_games
+from warehouse import DB_CONFIG, EMBEDDED_PATH, WAREHOUSES, EmbeddedWarehouse
+
+BATCH_SIZE = 5000  # games per executemany batch / commit in bulk mode
+WORKERS = 4  # connections loading batches at once in parallel mode
+DEADLOCK_RETRIES = 3  # times a parallel batch is retried after InnoDB picks it as a deadlock victim
+
+game_query = """INSERT INTO dim_game (game_id, name, required_age, price, metacritic_score, achievements,
+                content_hash, batch_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
+
+fact_query = """INSERT INTO fact_game_sales (game_key, platform_key, platform_mask, time_key, release_year,
+                ownership_key, recommendations, positive_reviews, negative_reviews,
+                average_playtime_forever, peak_ccu)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+# bulk mode assigns the surrogate keys itself, so the inserts carry them explicitly; a game that is
+# already loaded under that key is updated in place
+upsert_game_query = """INSERT INTO dim_game (game_key, game_id, name, required_age, price, metacritic_score,
+                       achievements, content_hash, batch_id)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) AS new
+                       ON DUPLICATE KEY UPDATE name = new.name, required_age = new.required_age,
+                       price = new.price, metacritic_score = new.metacritic_score,
+                       achievements = new.achievements, content_hash = new.content_hash,
+                       batch_id = new.batch_id"""
+
+upsert_fact_query = """INSERT INTO fact_game_sales (game_key, platform_key, platform_mask, time_key, release_year,
+                       ownership_key, recommendations, positive_reviews, negative_reviews,
+                       average_playtime_forever, peak_ccu)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) AS new
+                       ON DUPLICATE KEY UPDATE platform_key = new.platform_key,
+                       platform_mask = new.platform_mask, time_key = new.time_key,
+                       ownership_key = new.ownership_key, recommendations = new.recommendations,
+                       positive_reviews = new.positive_reviews, negative_reviews = new.negative_reviews,
+                       average_playtime_forever = new.average_playtime_forever, peak_ccu = new.peak_ccu"""
+
+# release_year is part of the fact table's primary key, so the upsert can't move a game to another year;
+# a changed game's row under its old year is deleted first
+delete_moved_fact_query = """DELETE FROM fact_game_sales WHERE game_key IN ({keys})"""
+
+# secondary indexes for the four dashboard query shapes (roll up, drill down, slice and dice, pivot).
+# They are not part of init.sql: create_indexes builds them after the data is loaded so inserts stay fast.
+# dim_platform and dim_ownership only hold a handful of rows and are served by their UNIQUE keys.
+INDEXES = [
+    # year range / single year filters, grouped by year and month, joined on time_key
+    ('dim_time', 'idx_dim_time_year_month', ('year', 'month', 'time_key')),
+    # price and metacritic buckets in slice and dice
+    ('dim_game', 'idx_dim_game_price_metacritic', ('price', 'metacritic_score')),
+    ('dim_game', 'idx_dim_game_metacritic', ('metacritic_score',)),
+    # a load's own games, whose fact rows finish_batch checks
+    ('dim_game', 'idx_dim_game_batch', ('batch_id',)),
+    # covering indexes for the fact side of each join, within the release_year partitions
+    ('fact_game_sales', 'idx_fact_year_game_recommendations', ('release_year', 'game_key', 'recommendations')),
+    ('fact_game_sales', 'idx_fact_time_game_recommendations', ('time_key', 'game_key', 'recommendations')),
+    ('fact_game_sales', 'idx_fact_year_platform_mask', ('release_year', 'platform_mask')),
+    ('fact_game_sales', 'idx_fact_platform_mask_game', ('platform_mask', 'game_key')),
+]
+
+# fact_game_sales.platform_mask packs the platform flags into bits, in the order of the platform natural
+# key; a new platform only needs a new bit here.
+PLATFORM_BITS = {'windows': 1, 'mac': 2, 'linux': 4}
+
+# init.sql only runs when the MySQL volume is first created; ensure_schema catches an existing one up.
+# Tables init.sql has and the warehouse lacks are created from it. Columns and unique keys added to a table
+# since are in ADDED_COLUMNS and UNIQUE_KEYS and are added in place. Tables whose layout changed are listed
+# in TABLE_REBUILDS as (table, a column the new layout added, its columns, a SELECT of them from the live
+# table): they are built from init.sql as <table>_new, filled from the live table and swapped in for it.
+ADDED_COLUMNS = [
+    # (table, column, its definition in init.sql), for the incremental load
+    ('dim_game', 'content_hash', 'CHAR(40)'),
+    ('dim_game', 'batch_id', 'INT'),
+]
+UNIQUE_KEYS = [
+    # the natural keys the loads upsert on, so a dimension value is only stored once
+    ('dim_game', ('game_id',)),
+    ('dim_platform', ('windows', 'mac', 'linux')),
+    ('dim_time', ('release_date',)),
+    ('dim_ownership', ('estimated_owners_min', 'estimated_owners_max')),
+]
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mysql-init', 'init.sql')
+TABLE_REBUILDS = [
+    # partitioned by release_year, with platform_mask and right-sized types; dim_time is LEFT JOINed, so
+    # a fact without its date fails release_year's NOT NULL rather than being left out
+    ('fact_game_sales', 'release_year',
+     ('game_key', 'platform_key', 'platform_mask', 'time_key', 'release_year', 'ownership_key', 'recommendations',
+      'positive_reviews', 'negative_reviews', 'average_playtime_forever', 'peak_ccu'),
+     f"""SELECT f.game_key, f.platform_key,
+            {' + '.join(f'COALESCE(dp.{platform}, 0) * {bit}' for platform, bit in PLATFORM_BITS.items())},
+            f.time_key, dt.year, f.ownership_key, f.recommendations, f.positive_reviews, f.negative_reviews,
+            f.average_playtime_forever, f.peak_ccu
+        FROM fact_game_sales f
+        LEFT JOIN dim_time dt ON f.time_key = dt.time_key
+        LEFT JOIN dim_platform dp ON f.platform_key = dp.platform_key"""),
+]
+
+# summary tables at the grains the dashboard reads; refresh_aggregates refreshes them after every load.
+# Each is (table, its columns, its scope, the SELECT that fills it). The scope is a (column, expression)
+# pair: the summary column a load's changes are tracked by, year or price_bucket, and the same value in
+# the star schema, which the SELECT's {scope} condition filters on.
+# Prices are bucketed in $5 steps, with everything from $100 up in the last bucket; slice-and-dice ranges
+# on those steps are answered from here.
+PRICE_BUCKET_SIZE = 5
+PRICE_BUCKET_MAX = 100
+PRICE_BUCKET_EXPRESSION = f"LEAST(FLOOR(dg.price / {PRICE_BUCKET_SIZE}) * {PRICE_BUCKET_SIZE}, {PRICE_BUCKET_MAX})"
+SAMPLE_PER_STRATUM = 200  # games sampled per release month
+
+AGGREGATES = [
+    ('agg_year', ('year', 'game_count', 'sum_metacritic_score', 'metacritic_count', 'total_recommendations'),
+     ('year', 'fgs.release_year'),
+     """SELECT fgs.release_year, COUNT(*), SUM(dg.metacritic_score), COUNT(dg.metacritic_score), SUM(fgs.recommendations)
+        FROM fact_game_sales fgs
+        JOIN dim_game dg ON fgs.game_key = dg.game_key
+        WHERE {scope}
+        GROUP BY fgs.release_year"""),
+    ('agg_year_month', ('year', 'month', 'games_released', 'sum_price', 'price_count'),
+     ('year', 'dt.year'),
+     """SELECT dt.year, dt.month, COUNT(DISTINCT fgs.game_key), SUM(dg.price), COUNT(dg.price)
+        FROM fact_game_sales fgs
+        JOIN dim_game dg ON fgs.game_key = dg.game_key
+        JOIN dim_time dt ON fgs.time_key = dt.time_key
+        WHERE {scope}
+        GROUP BY dt.year, dt.month"""),
+    ('agg_platform_year', ('year', 'platform_mask', 'game_count'),
+     ('year', 'fgs.release_year'),
+     """SELECT fgs.release_year, fgs.platform_mask, COUNT(*)
+        FROM fact_game_sales fgs
+        WHERE {scope}
+        GROUP BY fgs.release_year, fgs.platform_mask"""),
+    ('agg_price_metacritic_platform', ('price_bucket', 'metacritic_range', 'platform_mask', 'game_count'),
+     ('price_bucket', PRICE_BUCKET_EXPRESSION),
+     f"""SELECT {PRICE_BUCKET_EXPRESSION} AS price_bucket,
+            CASE
+                WHEN dg.metacritic_score < 50 THEN 'Low'
+                WHEN dg.metacritic_score >= 50 AND dg.metacritic_score < 75 THEN 'Medium'
+                ELSE 'High'
+            END AS metacritic_range,
+            fgs.platform_mask,
+            COUNT(*)
+        FROM fact_game_sales fgs
+        JOIN dim_game dg ON fgs.game_key = dg.game_key
+        WHERE {{scope}}
+        GROUP BY price_bucket, metacritic_range, fgs.platform_mask"""),
+    # for approximate slice and dice answers (see approx.py): a sample of up to SAMPLE_PER_STRATUM games
+    # from every release month, each row carrying the size of its month so estimates can be weighted back up
+    ('sample_game_sales', ('year', 'month', 'price', 'metacritic_score', 'platform_mask', 'stratum_size'),
+     ('year', 'dt.year'),
+     f"""SELECT year, month, price, metacritic_score, platform_mask, stratum_size
+        FROM (
+            SELECT dt.year, dt.month, dg.price, dg.metacritic_score, fgs.platform_mask,
+                ROW_NUMBER() OVER (PARTITION BY dt.year, dt.month ORDER BY RAND()) AS stratum_row,
+                COUNT(*) OVER (PARTITION BY dt.year, dt.month) AS stratum_size
+            FROM fact_game_sales fgs
+            JOIN dim_game dg ON fgs.game_key = dg.game_key
+            JOIN dim_time dt ON fgs.time_key = dt.time_key
+            WHERE {{scope}}
+        ) strata
+        WHERE stratum_row <= {SAMPLE_PER_STRATUM}"""),
+]
+
+start_batch_query = """INSERT INTO etl_batch (mode, started_at) VALUES (%s, NOW())"""
+# loads that started after the latest finished one and never finished themselves, bar the running one
+unsummarised_batches_query = """SELECT COUNT(*) FROM etl_batch
+    WHERE finished_at IS NULL AND batch_id <> %s
+        AND batch_id > (SELECT COALESCE(MAX(batch_id), 0) FROM etl_batch WHERE finished_at IS NOT NULL)"""
+
+finish_batch_query = """UPDATE etl_batch
+                        SET finished_at = NOW(), games_new = %s, games_changed = %s, games_unchanged = %s
+                        WHERE batch_id = %s"""
+
+# the star schema of init.sql for the embedded warehouse, in types both DuckDB and SQLite accept.
+# It has no summary tables: the dashboard answers from the star join there.
+embedded_schema = [
+    """CREATE TABLE dim_game (game_key INTEGER PRIMARY KEY, game_id INTEGER, name VARCHAR, required_age INTEGER,
+                             price DOUBLE, metacritic_score INTEGER, achievements INTEGER)""",
+    """CREATE TABLE dim_platform (platform_key INTEGER PRIMARY KEY, windows BOOLEAN, mac BOOLEAN, linux BOOLEAN)""",
+    """CREATE TABLE dim_time (time_key INTEGER PRIMARY KEY, release_date DATE, year INTEGER, month INTEGER,
+                             day INTEGER)""",
+    """CREATE TABLE dim_ownership (ownership_key INTEGER PRIMARY KEY, estimated_owners_min INTEGER,
+                                  estimated_owners_max INTEGER)""",
+    """CREATE TABLE fact_game_sales (game_key INTEGER PRIMARY KEY, platform_key INTEGER, platform_mask TINYINT NOT NULL,
+                                    time_key INTEGER, release_year SMALLINT NOT NULL, ownership_key INTEGER,
+                                    recommendations INTEGER,
+                                    positive_reviews INTEGER, negative_reviews INTEGER,
+                                    average_playtime_forever INTEGER, peak_ccu INTEGER)""",
+    """CREATE TABLE etl_batch (batch_id INTEGER PRIMARY KEY, mode VARCHAR, started_at VARCHAR, finished_at VARCHAR,
+                              games_new INTEGER, games_changed INTEGER, games_unchanged INTEGER)""",
+]
+
+def connect():
+    """Connects to the data warehouse."""
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def load_cleaned_data(json_file_path):
+    """Loads the cleaned games written by cleanup.py.
+
+    A columnar directory is memory-mapped and streamed in column batches instead of being parsed
+    up front, so loading it costs no more memory than one batch.
+    """
+    if json_file_path.endswith(COLUMNAR_SUFFIX):
+        return iter_columnar_games(json_file_path)
+    with open(json_file_path, 'r') as file:
+        return json.load(file)
+
+
+class DimensionCache:
+    """Maps a dimension's natural key to its surrogate key so each distinct value is inserted only once.
+
+    to_row turns a natural key into the dimension's column values, from_row does the reverse for rows
+    read back from the database.
+    """
+
+    def __init__(self, table, key_column, columns, to_row, from_row):
+        self.table = table
+        self.key_column = key_column
+        self.columns = columns
+        self.to_row = to_row
+        self.from_row = from_row
+        self.keys = {}
+        self.next_key = 1
+        self.pending = []  # new rows waiting for flush in bulk mode
+        self.inserted = 0  # rows this load added to the dimension
+
+        placeholders = ', '.join(['%s'] * len(columns))
+        self.insert_query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        self.bulk_insert_query = f"INSERT INTO {table} ({key_column}, {', '.join(columns)}) VALUES (%s, {placeholders})"
+
+    def seed(self, cursor):
+        """Loads the values already in the dimension."""
+        cursor.execute(f"SELECT {self.key_column}, {', '.join(self.columns)} FROM {self.table}")
+        for key, *row in cursor.fetchall():
+            self.keys.setdefault(self.from_row(row), key)
+            self.next_key = max(self.next_key, key + 1)
+
+    def get_or_insert(self, cursor, natural_key):
+        """Returns the surrogate key, inserting the value right away if it is new."""
+        key = self.keys.get(natural_key)
+        if key is None:
+            cursor.execute(self.insert_query, self.to_row(natural_key))
+            self.inserted += 1
+            key = self.keys[natural_key] = cursor.lastrowid
+            self.next_key = max(self.next_key, key + 1)
+        return key
+
+    def get_or_assign(self, natural_key):
+        """Returns the surrogate key, assigning one on the client and queueing the row if the value is new."""
+        key = self.keys.get(natural_key)
+        if key is None:
+            key = self.keys[natural_key] = self.next_key
+            self.next_key += 1
+            self.pending.append((key,) + tuple(self.to_row(natural_key)))
+        return key
+
+    def flush(self, cursor):
+        """Inserts the rows queued by get_or_assign."""
+        if self.pending:
+            cursor.executemany(self.bulk_insert_query, self.pending)
+            self.inserted += len(self.pending)
+            self.pending = []
+
+
+def dimension_caches(cursor):
+    """Builds the platform, time and ownership lookups, seeded from whatever is already loaded."""
+
+    caches = {
+        'platform': DimensionCache('dim_platform', 'platform_key', ('windows', 'mac', 'linux'),
+                                   to_row=lambda flags: flags,
+                                   from_row=lambda row: tuple(bool(flag) for flag in row)),
+        'time': DimensionCache('dim_time', 'time_key', ('release_date', 'year', 'month', 'day'),
+                               to_row=lambda day: (day, day.year, day.month, day.day),
+                               from_row=lambda row: row[0]),
+        'ownership': DimensionCache('dim_ownership', 'ownership_key', ('estimated_owners_min', 'estimated_owners_max'),
+                                    to_row=lambda owners: owners,
+                                    from_row=tuple),
+    }
+    for cache in caches.values():
+        cache.seed(cursor)
+    return caches
+
+
+def rows_written(counts, caches):
+    """Rows each table received during a load, for the run report."""
+    written = counts['new'] + counts['changed']
+    rows = {'dim_game': written, 'fact_game_sales': written}
+    rows.update({cache.table: cache.inserted for cache in caches.values()})
+    return rows
+
+
+def content_hash(game):
+    """Fingerprints a cleaned game so reloads can tell changed games from unchanged ones."""
+    return hashlib.sha1(json.dumps(game, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def natural_keys(game):
+    """Returns the platform, time and ownership natural keys of a cleaned game."""
+    return ((bool(game['windows']), bool(game['mac']), bool(game['linux'])),
+            date.fromisoformat(game['release_date']),
+            (game['estimated_owners_min'], game['estimated_owners_max']))
+
+
+def platform_mask(platform):
+    """Packs a platform natural key, a tuple of flags in PLATFORM_BITS order, into its bit mask."""
+    return sum(bit for flag, bit in zip(platform, PLATFORM_BITS.values()) if flag)
+
+
+def platform_masks(platform):
+    """Every platform_mask value with the platform's bit set.
+
+    Filtering on platform_mask IN (...) these can use an index on platform_mask; a bitwise test can't.
+    """
+    return [mask for mask in range(1 << len(PLATFORM_BITS)) if mask & PLATFORM_BITS[platform]]
+
+
+def start_batch(db, mode):
+    """Records the start of a load in etl_batch and returns its batch id."""
+    cursor = db.cursor()
+    cursor.execute(start_batch_query, (mode,))
+    db.commit()
+    return cursor.lastrowid
+
+
+def finish_batch(db, batch_id, counts, touched=None):
+    """Checks the fact rows' keys, then refreshes the summary tables and marks a load as finished in the
+    same transaction.
+
+    With touched (see keyed_batches), only the fact rows of this batch's games are checked and only the
+    summary rows of the years and price buckets it touched are rebuilt; without it, everything is.
+    The latest finished batch is the load watermark, and the dashboard uses it as its data version.
+    """
+    # partitioned, fact_game_sales can't have foreign keys of its own
+    check_foreign_keys(db, batch_id=None if touched is None else batch_id)
+    refresh_aggregates(db, touched, commit=False)
+    cursor = db.cursor()
+    cursor.execute(finish_batch_query, (counts['new'], counts['changed'], counts['unchanged'], batch_id))
+    db.commit()
+
+
+def etl_process(db, data):
+    """Loads games one INSERT at a time, wiring up the fact row through lastrowid.
+
+    Every game is inserted as new, so this only loads an empty warehouse; reloads use bulk_etl_process.
+    """
+
+    cursor = db.cursor()
+    if not warehouse_empty(cursor):
+        raise ValueError("Row mode only loads an empty warehouse; use --mode incremental or bulk to reload")
+
+    batch_id = start_batch(db, 'row')
+    caches = dimension_caches(cursor)
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+
     for game in data:
         # Insert into dim_game
-        game_query = """INSERT INTO dim_game (game_id, name, required_age, price, metacritic_score, achievements)
-                        VALUES (%s, %s, %s, %s, %s, %s)"""
         game_values = (game['game_id'], game['name'], game['required_age'], game['price'],
-                       game['metacritic_score'], game['achievements'])
+                       game['metacritic_score'], game['achievements'], content_hash(game), batch_id)
         cursor.execute(game_query, game_values)
         game_key = cursor.lastrowid
 
-        # Insert into dim_platform
-        platform_query = """INSERT INTO dim_platform (windows, mac, linux)
-                            VALUES (%s, %s, %s)"""
-        platform_values = (game['windows'], game['mac'], game['linux'])
-        cursor.execute(platform_query, platform_values)
-        platform_key = cursor.lastrowid
-
-        # Insert into dim_time
-        release_date = datetime.strptime(game['release_date'], '%Y-%m-%d')
-        time_query = """INSERT INTO dim_time (release_date, year, month, day)
-                        VALUES (%s, %s, %s, %s)"""
-        time_values = (release_date, release_date.year, release_date.month, release_date.day)
-        cursor.execute(time_query, time_values)
-        time_key = cursor.lastrowid
-
-        # Insert into dim_ownership
-        ownership_query = """INSERT INTO dim_ownership (estimated_owners_min, estimated_owners_max)
-                             VALUES (%s, %s)"""
-        ownership_values = (game['estimated_owners_min'], game['estimated_owners_max'])
-        cursor.execute(ownership_query, ownership_values)
-        ownership_key = cursor.lastrowid
+        # Look up (or insert) the shared platform, time and ownership rows
+        platform, release_date, owners = natural_keys(game)
+        platform_key = caches['platform'].get_or_insert(cursor, platform)
+        time_key = caches['time'].get_or_insert(cursor, release_date)
+        ownership_key = caches['ownership'].get_or_insert(cursor, owners)
 
         # Insert into fact_game_sales
-        fact_query = """INSERT INTO fact_game_sales (game_key, platform_key, time_key, ownership_key,
-                        recommendations, positive_reviews, negative_reviews,
-                        average_playtime_forever, peak_ccu)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-        fact_values = (game_key, platform_key, time_key, ownership_key,
+        fact_values = (game_key, platform_key, platform_mask(platform), time_key, release_date.year, ownership_key,
                        game['recommendations'], game['positive'],
                        game['negative'], game['average_playtime_forever'], game['peak_ccu'])
 
         cursor.execute(fact_query, fact_values)
+        counts['new'] += 1
+
+    db.commit()
+    finish_batch(db, batch_id, counts)
+    counts['rows'] = rows_written(counts, caches)
+    return counts
+
+
+def next_key(cursor, table, key_column):
+    """Returns the first unused surrogate key of a table."""
+    cursor.execute(f"SELECT COALESCE(MAX({key_column}), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def warehouse_empty(cursor):
+    """Whether no game has been loaded yet."""
+    cursor.execute("SELECT 1 FROM dim_game LIMIT 1")
+    return not cursor.fetchall()
+
+
+def price_bucket(price):
+    """The summary tables' price bucket of a price, as PRICE_BUCKET_EXPRESSION computes it in MySQL."""
+    if price is None:
+        return None
+    # rounded to the cents dim_game.price keeps first, so a new price lands where the stored one will
+    return min(math.floor(round(price, 2) / PRICE_BUCKET_SIZE) * PRICE_BUCKET_SIZE, PRICE_BUCKET_MAX)
+
+
+def loaded_games(cursor):
+    """Maps the game_id of every loaded game to its (game_key, content_hash, release_year, price_bucket)."""
+    cursor.execute("""SELECT dg.game_id, dg.game_key, dg.content_hash, f.release_year, dg.price
+                      FROM dim_game dg
+                      LEFT JOIN fact_game_sales f ON f.game_key = dg.game_key""")
+    return {game_id: (game_key, digest, year, price_bucket(price))
+            for game_id, game_key, digest, year, price in cursor.fetchall()}
+
+
+def batches(data, batch_size):
+    """Splits any iterable of games into lists of at most batch_size games."""
+    iterator = iter(data)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def delete_moved_facts(cursor, game_keys):
+    """Deletes the fact rows of a batch's games that moved to another release year, in one statement."""
+    cursor.execute(delete_moved_fact_query.format(keys=', '.join(['%s'] * len(game_keys))), game_keys)
+
+
+def keyed_batches(cursor, data, batch_size, batch_id, caches, counts, incremental=False, touched=None):
+    """Turns games into batches of (game_rows, fact_rows, moved_rows) with every surrogate key already assigned.
+
+    Game keys are handed out in input order from the first unused key, and new platform, time and
+    ownership values are queued in caches until the caller flushes them, so the keys only depend on
+    the input and never on which connection ends up writing a row. moved_rows are the game_keys of
+    changed games whose release year changed, whose fact rows are deleted before the upsert.
+
+    Games already in dim_game keep their game_key in every mode, so the upserts rewrite their rows
+    instead of adding a second fact row under a new key. incremental=True skips the unchanged ones;
+    otherwise every game is written and the loaded ones count as changed.
+
+    touched, a {'year': set(), 'price_bucket': set()}, collects the summary rows the written games
+    affect, under both their old and their new release year and price bucket, for finish_batch.
+    """
+
+    loaded = loaded_games(cursor)
+    game_key = next_key(cursor, 'dim_game', 'game_key')
+
+    for batch in batches(data, batch_size):
+        game_rows, fact_rows, moved_rows = [], [], []
+
+        for game in batch:
+            digest = content_hash(game)
+            changed = game['game_id'] in loaded
+            if changed:
+                key, loaded_digest, loaded_year, loaded_bucket = loaded[game['game_id']]
+                if incremental and digest == loaded_digest:
+                    counts['unchanged'] += 1
+                    continue
+                counts['changed'] += 1
+            else:
+                key = game_key
+                game_key += 1
+                counts['new'] += 1
+            platform, release_date, owners = natural_keys(game)
+            bucket = price_bucket(game['price'])
+            loaded[game['game_id']] = (key, digest, release_date.year, bucket)
+            if touched is not None:
+                touched['year'].add(release_date.year)
+                touched['price_bucket'].add(bucket)
+                if changed:
+                    touched['year'].add(loaded_year)
+                    touched['price_bucket'].add(loaded_bucket)
 
+            game_rows.append((key, game['game_id'], game['name'], game['required_age'], game['price'],
+                              game['metacritic_score'], game['achievements'], digest, batch_id))
+
+            if changed and loaded_year is not None and loaded_year != release_date.year:
+                # release_year is part of the fact key, so an upsert can't move the row to a new year
+                moved_rows.append(key)
+            fact_rows.append((key, caches['platform'].get_or_assign(platform), platform_mask(platform),
+                              caches['time'].get_or_assign(release_date), release_date.year,
+                              caches['ownership'].get_or_assign(owners),
+                              game['recommendations'], game['positive'],
+                              game['negative'], game['average_playtime_forever'], game['peak_ccu']))
+
+        if game_rows:
+            yield game_rows, fact_rows, moved_rows
+
+
+def new_touched(cursor, batch_id):
+    """An empty record of what a load touches, for keyed_batches to fill.
+
+    None, so the summary tables are rebuilt whole, for a first load, and after a load that failed
+    part way: its committed batches are in the star schema but were never summarised, and the next
+    run sees those games as unchanged. Only the first load to finish after it has to; from then on
+    the failed batch is older than the latest finished one.
+    """
+    if warehouse_empty(cursor):
+        return None
+    cursor.execute(unsummarised_batches_query, (batch_id,))
+    if cursor.fetchone()[0]:
+        return None
+    return {'year': set(), 'price_bucket': set()}
+
+
+def bulk_etl_process(db, data, batch_size=BATCH_SIZE, incremental=False):
+    """Loads games in batches, assigning surrogate keys on the client.
+
+    Each batch sends one multi-row executemany per table and is committed on its own, so the
+    number of round trips grows with the number of batches rather than the number of games.
+    Platform, time and ownership rows are only sent the first time their value is seen.
+
+    Games already in dim_game are matched by game_id and updated in place under their existing
+    game_key. With incremental=True, unchanged games (same content hash) are skipped, so a refresh
+    only writes the change set.
+    """
+
+    batch_id = start_batch(db, 'incremental' if incremental else 'bulk')
+    cursor = db.cursor()
+    caches = dimension_caches(cursor)
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+    touched = new_touched(cursor, batch_id)
+
+    for game_rows, fact_rows, moved_rows in keyed_batches(cursor, data, batch_size, batch_id, caches, counts,
+                                                          incremental, touched):
+        cursor.executemany(upsert_game_query, game_rows)
+        for cache in caches.values():
+            cache.flush(cursor)
+        if moved_rows:
+            delete_moved_facts(cursor, moved_rows)
+        cursor.executemany(upsert_fact_query, fact_rows)
+        db.commit()
+
+    finish_batch(db, batch_id, counts, touched)
+    counts['rows'] = rows_written(counts, caches)
+    return counts
+
+
+class LoadWorker(threading.Thread):
+    """Writes keyed batches from a queue through its own connection and times itself."""
+
+    def __init__(self, index, batch_queue, defer_fk_checks=False):
+        super().__init__(name=f'etl-worker-{index}')
+        self.index = index
+        self.batch_queue = batch_queue
+        self.defer_fk_checks = defer_fk_checks
+        self.rows = 0
+        self.busy_time = 0.0
+        self.error = None
+
+    def run(self):
+        db = cursor = None
+        try:
+            db = connect()
+            cursor = db.cursor()
+            if self.defer_fk_checks:
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+        except mysql.connector.Error as e:
+            self.error = e
+
+        while True:
+            item = self.batch_queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # keep draining so the producer never blocks on a dead worker
+            game_rows, fact_rows, moved_rows = item
+            start_time = time.perf_counter()
+            try:
+                self.write(db, cursor, game_rows, fact_rows, moved_rows)
+            except mysql.connector.Error as e:
+                self.error = e
+            else:
+                self.rows += len(game_rows) + len(fact_rows)  # only batches that were committed
+            self.busy_time += time.perf_counter() - start_time
+
+        if db is not None:
+            db.close()
+
+    def write(self, db, cursor, game_rows, fact_rows, moved_rows):
+        for attempt in range(DEADLOCK_RETRIES + 1):
+            try:
+                cursor.executemany(upsert_game_query, game_rows)
+                if moved_rows:
+                    delete_moved_facts(cursor, moved_rows)
+                cursor.executemany(upsert_fact_query, fact_rows)
+                db.commit()
+                return
+            except mysql.connector.Error as e:
+                db.rollback()
+                if e.errno != 1213 or attempt == DEADLOCK_RETRIES:  # ER_LOCK_DEADLOCK
+                    raise
+
+    def stats(self):
+        return {'worker': self.index, 'rows': self.rows, 'seconds': self.busy_time,
+                'rows_per_second': self.rows / self.busy_time if self.busy_time else 0.0}
+
+
+def parallel_etl_process(db, data, workers=WORKERS, batch_size=BATCH_SIZE, defer_fk_checks=False):
+    """Loads games through a pool of worker connections, one keyed batch at a time per worker.
+
+    This connection assigns every surrogate key up front (see keyed_batches) and commits each batch's
+    new dimension rows before handing the batch out, so the workers only write dim_game and fact rows
+    for disjoint key ranges and the result is identical to a serial incremental load.
+
+    With defer_fk_checks=True the workers turn foreign key checks off, though the partitioned fact
+    table has none left to check: finish_batch verifies the batch's rows in one pass instead. Returns the
+    load counts and each worker's throughput.
+    """
+
+    batch_id = start_batch(db, 'parallel')
+    cursor = db.cursor()
+    caches = dimension_caches(cursor)
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+    touched = new_touched(cursor, batch_id)
+
+    batch_queue = queue.Queue(maxsize=workers * 2)
+    pool = [LoadWorker(index, batch_queue, defer_fk_checks) for index in range(workers)]
+    for worker in pool:
+        worker.start()
+
+    try:
+        for game_rows, fact_rows, moved_rows in keyed_batches(cursor, data, batch_size, batch_id, caches, counts,
+                                                              incremental=True, touched=touched):
+            if any(worker.error is not None for worker in pool):
+                break  # the load fails anyway; don't key and queue the rest of the input
+            for cache in caches.values():
+                cache.flush(cursor)
+            db.commit()
+            batch_queue.put((game_rows, fact_rows, moved_rows))
+    finally:
+        for _ in pool:
+            batch_queue.put(None)
+        for worker in pool:
+            worker.join()
+
+    errors = [worker.error for worker in pool if worker.error is not None]
+    if errors:
+        raise errors[0]
+
+    finish_batch(db, batch_id, counts, touched)
+    counts['rows'] = rows_written(counts, caches)
+    return counts, [worker.stats() for worker in pool]
+
+
+def check_foreign_keys(db, batch_id=None):
+    """Raises if any fact row points at a missing dimension row, which MySQL doesn't check on the fact table.
+
+    With batch_id, only the fact rows of the games that batch wrote are checked. Those are found
+    through dim_game, so their game_key needs no check.
+    """
+
+    cursor = db.cursor()
+    for column, table in (('game_key', 'dim_game'), ('platform_key', 'dim_platform'),
+                          ('time_key', 'dim_time'), ('ownership_key', 'dim_ownership')):
+        if batch_id is None:
+            cursor.execute(f"""SELECT COUNT(*) FROM fact_game_sales f
+                               LEFT JOIN {table} d ON f.{column} = d.{column}
+                               WHERE f.{column} IS NOT NULL AND d.{column} IS NULL""")
+        elif column == 'game_key':
+            continue
+        else:
+            cursor.execute(f"""SELECT COUNT(*) FROM dim_game g
+                               JOIN fact_game_sales f ON f.game_key = g.game_key
+                               LEFT JOIN {table} d ON f.{column} = d.{column}
+                               WHERE g.batch_id = %s AND f.{column} IS NOT NULL AND d.{column} IS NULL""",
+                           (batch_id,))
+        orphans = cursor.fetchone()[0]
+        if orphans:
+            raise ValueError(f"{orphans} fact_game_sales rows reference a missing {table}.{column}")
+
+
+def create_indexes(db):
+    """Creates any secondary index from INDEXES that does not exist yet."""
+
+    cursor = db.cursor()
+    cursor.execute("""SELECT DISTINCT table_name, index_name FROM information_schema.statistics
+                      WHERE table_schema = DATABASE()""")
+    existing = {(table.lower(), index.lower()) for table, index in cursor.fetchall()}
+
+    for table, index, columns in INDEXES:
+        if (table, index.lower()) not in existing:
+            cursor.execute(f"CREATE INDEX {index} ON {table} ({', '.join(columns)})")
     db.commit()
 
-# Run ETL process
-etl_process(game_data)
 
-# Close database connection
-db.close()
+def drop_indexes(db):
+    """Drops the secondary indexes in INDEXES, so a large load doesn't maintain them row by row."""
+
+    cursor = db.cursor()
+    cursor.execute("""SELECT DISTINCT table_name, index_name FROM information_schema.statistics
+                      WHERE table_schema = DATABASE()""")
+    existing = {(table.lower(), index.lower()) for table, index in cursor.fetchall()}
+
+    for table, index, columns in INDEXES:
+        if (table, index.lower()) in existing:
+            cursor.execute(f"DROP INDEX {index} ON {table}")
+    db.commit()
+
+
+def schema_tables(path=SCHEMA_PATH):
+    """Maps each table in init.sql to its CREATE TABLE statement."""
+    with open(path, 'r') as f:
+        # comments first, as some of them have semicolons in
+        script = '\n'.join(line.split('--')[0].rstrip() for line in f)
+    tables = {}
+    for statement in script.split(';'):
+        statement = statement.strip()
+        if statement.upper().startswith('CREATE TABLE'):
+            tables[statement.split()[2].lower()] = statement
+    return tables
+
+
+def ensure_schema(db):
+    """Brings a warehouse created from an older init.sql up to date, since init.sql only runs on a new volume.
+
+    Creates the tables it lacks, adds the columns and unique keys they lack, and rebuilds the ones in
+    TABLE_REBUILDS that lack their new column, copying their rows over. A rebuild that doesn't copy
+    every row raises and leaves the table as it was, and so does a unique key the rows already break,
+    as the loads before UNIQUE_KEYS left them: such a volume has to be recreated. Returns what it changed.
+    """
+
+    cursor = db.cursor()
+    cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()")
+    existing = {table.lower() for table, in cursor.fetchall()}
+    tables = schema_tables()
+    changes = []
+    for table, statement in tables.items():
+        if table not in existing:
+            cursor.execute(statement)
+            changes.append(f"created {table}")
+
+    cursor.execute("SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = DATABASE()")
+    columns = {(table.lower(), column.lower()) for table, column in cursor.fetchall()}
+    for table, column, definition in ADDED_COLUMNS:
+        if (table, column) not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            changes.append(f"added {table}.{column}")
+
+    cursor.execute("""SELECT table_name, index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index)
+                      FROM information_schema.statistics WHERE table_schema = DATABASE() AND non_unique = 0
+                      GROUP BY table_name, index_name""")
+    unique_keys = {(table.lower(), tuple(key.lower().split(','))) for table, _, key in cursor.fetchall()}
+    for table, key in UNIQUE_KEYS:
+        if (table, key) not in unique_keys:
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD UNIQUE ({', '.join(key)})")
+            except mysql.connector.IntegrityError as e:
+                raise ValueError(f"{table} has rows with the same {', '.join(key)}, as loads before the unique key "
+                                 f"wrote them, so this volume can't be upgraded in place; recreate it with "
+                                 f"docker-compose down -v and load again") from e
+            changes.append(f"added a unique key on {table} ({', '.join(key)})")
+
+    for table, column, copy_columns, copy_query in TABLE_REBUILDS:
+        if (table, column) not in columns:
+            # left behind by a rebuild that failed part way
+            cursor.execute(f"DROP TABLE IF EXISTS {table}_new, {table}_old")
+            cursor.execute(tables[table].replace(f"CREATE TABLE {table}", f"CREATE TABLE {table}_new", 1))
+            cursor.execute(f"INSERT INTO {table}_new ({', '.join(copy_columns)}) {copy_query}")
+            cursor.execute(f"SELECT (SELECT COUNT(*) FROM {table}), (SELECT COUNT(*) FROM {table}_new)")
+            old_rows, new_rows = cursor.fetchone()
+            if old_rows != new_rows:
+                cursor.execute(f"DROP TABLE {table}_new")
+                raise ValueError(f"Rebuilding {table} copied {new_rows} of its {old_rows} rows; it is left as it was")
+            # one statement, so the table is never missing in between
+            cursor.execute(f"RENAME TABLE {table} TO {table}_old, {table}_new TO {table}")
+            cursor.execute(f"DROP TABLE {table}_old")
+            changes.append(f"rebuilt {table} with {column}")
+    # loads only refresh the summary rows they touch, so a new summary table is filled whole here
+    if any(table not in existing for table, *_ in AGGREGATES):
+        refresh_aggregates(db, commit=False)
+        changes.append("filled the new summary tables")
+    db.commit()
+    return changes
+
+
+def in_values(expression, values):
+    """A condition matching expression against values, None matching NULL, and its parameters."""
+    known = sorted(value for value in values if value is not None)
+    conditions = [f"{expression} IN ({', '.join(['%s'] * len(known))})"] if known else []
+    if None in values:
+        conditions.append(f"{expression} IS NULL")
+    return f"({' OR '.join(conditions)})", tuple(known)
+
+
+def refresh_aggregates(db, touched=None, commit=True):
+    """Rebuilds the summary tables in AGGREGATES from the star schema in one transaction.
+
+    touched maps each scope column to the values a load changed (see keyed_batches); only those rows
+    are deleted and rebuilt. Without it, every table is rebuilt whole.
+    """
+
+    cursor = db.cursor()
+    for table, columns, (scope_column, scope_expression), query in AGGREGATES:
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) {query}"
+        if touched is None:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(insert.format(scope='TRUE'))
+        elif touched[scope_column]:
+            condition, params = in_values(scope_column, touched[scope_column])
+            cursor.execute(f"DELETE FROM {table} WHERE {condition}", params)
+            condition, params = in_values(scope_expression, touched[scope_column])
+            cursor.execute(insert.format(scope=condition), params)
+    if commit:
+        db.commit()
+
+
+def numbered(frame, key_column):
+    """Numbers the distinct rows of frame from 1; returns the dimension rows and every input row's key."""
+    keys = frame.groupby(list(frame.columns), sort=True, dropna=False).ngroup() + 1
+    dimension = frame.assign(**{key_column: keys}).drop_duplicates(key_column).sort_values(key_column)
+    return dimension[[key_column, *frame.columns]], keys
+
+
+def embedded_etl_process(path, data):
+    """Builds the embedded warehouse at path straight from the cleaned games, one bulk insert per table.
+
+    Every surrogate key is assigned in pandas, as a whole-table rebuild rather than an incremental
+    load. The file is written next to path and renamed over it once complete, so a dashboard reading
+    the old file moves to the new one on its next query; the batch id carries on from the old file,
+    which keeps it usable as the dashboard's data version.
+    """
+
+    started_at = datetime.now()
+    warehouse = EmbeddedWarehouse(path)
+    batch_id = 1
+    if os.path.exists(path):
+        try:
+            _, rows = warehouse.execute("SELECT MAX(batch_id) FROM etl_batch")
+            batch_id = (rows[0][0] or 0) + 1
+        except warehouse.Error:
+            pass  # not a warehouse we can read; it is replaced all the same
+        warehouse.dispose()
+
+    games = pd.DataFrame.from_records(list(data))
+    if games.empty:
+        raise ValueError("No games to load")
+    # a game_id listed twice keeps its last record, as the upserts of the MySQL loads do
+    games = games.drop_duplicates('game_id', keep='last').reset_index(drop=True)
+    games['game_key'] = games.index + 1
+
+    platforms = games[list(PLATFORM_BITS)].fillna(False).astype(bool)
+    dim_platform, platform_keys = numbered(platforms, 'platform_key')
+    release_dates = pd.to_datetime(games['release_date'])
+    dim_time, time_keys = numbered(pd.DataFrame({
+        'release_date': release_dates.dt.strftime('%Y-%m-%d'),
+        'year': release_dates.dt.year,
+        'month': release_dates.dt.month,
+        'day': release_dates.dt.day,
+    }), 'time_key')
+    dim_ownership, ownership_keys = numbered(games[['estimated_owners_min', 'estimated_owners_max']], 'ownership_key')
+
+    tables = {
+        'dim_game': games[['game_key', 'game_id', 'name', 'required_age', 'price', 'metacritic_score',
+                           'achievements']],
+        'dim_platform': dim_platform,
+        'dim_time': dim_time,
+        'dim_ownership': dim_ownership,
+        'fact_game_sales': pd.DataFrame({
+            'game_key': games['game_key'],
+            'platform_key': platform_keys,
+            'platform_mask': sum(platforms[platform].astype(int) * bit for platform, bit in PLATFORM_BITS.items()),
+            'time_key': time_keys,
+            'release_year': release_dates.dt.year,
+            'ownership_key': ownership_keys,
+            'recommendations': games['recommendations'],
+            'positive_reviews': games['positive'],
+            'negative_reviews': games['negative'],
+            'average_playtime_forever': games['average_playtime_forever'],
+            'peak_ccu': games['peak_ccu'],
+        }),
+        'etl_batch': pd.DataFrame([{
+            'batch_id': batch_id, 'mode': 'embedded', 'started_at': started_at.isoformat(sep=' ', timespec='seconds'),
+            'finished_at': datetime.now().isoformat(sep=' ', timespec='seconds'),
+            'games_new': len(games), 'games_changed': 0, 'games_unchanged': 0,
+        }]),
+    }
+
+    staging = f'{path}.tmp'
+    for leftover in (staging, f'{staging}.wal'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    db = warehouse.connect(staging, read_only=False)
+    try:
+        for statement in embedded_schema:
+            db.execute(statement)
+        for table, frame in tables.items():
+            warehouse.write_frame(db, table, frame)
+        # a columnar engine scans without them; SQLite stores rows and needs the same indexes as MySQL,
+        # bar the ones on columns only MySQL's loads keep, like dim_game.batch_id
+        if not warehouse.columnar:
+            for table, index, columns in INDEXES:
+                if set(columns) <= set(tables[table].columns):
+                    db.execute(f"CREATE INDEX {index} ON {table} ({', '.join(columns)})")
+        db.commit()
+    finally:
+        db.close()
+    os.replace(staging, path)
+
+    counts = {'new': len(games), 'changed': 0, 'unchanged': 0}
+    counts['rows'] = {table: len(frame) for table, frame in tables.items() if table != 'etl_batch'}
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the cleaned games into the data warehouse.")
+    parser.add_argument('--input', default='dataset/cleaned_games.json')
+    parser.add_argument('--warehouse', choices=WAREHOUSES, default=os.environ.get('WAREHOUSE', 'mysql'),
+                        help="mysql loads the MySQL server (default); embedded rebuilds the --warehouse-path file "
+                             "from --input, ignoring --mode and the index options")
+    parser.add_argument('--warehouse-path', default=os.environ.get('WAREHOUSE_PATH', EMBEDDED_PATH),
+                        help="embedded warehouse file: .duckdb for DuckDB, .sqlite for SQLite")
+    parser.add_argument('--mode', choices=('incremental', 'bulk', 'parallel', 'row'), default='incremental',
+                        help="incremental only writes new and changed games (default); bulk loads every game "
+                             "in executemany batches; parallel is incremental through --workers connections; "
+                             "row inserts one game at a time into an empty warehouse")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=WORKERS, help="connections used in parallel mode")
+    parser.add_argument('--defer-fk-checks', action='store_true',
+                        help="parallel mode: load with foreign key checks off; every load is verified once at the end")
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help="drop the secondary indexes before loading; they are rebuilt afterwards")
+    parser.add_argument('--skip-indexes', action='store_true',
+                        help="don't create the secondary indexes after loading")
+    parser.add_argument('--report', default='dataset/etl_report.json', help="where to write the JSON run report")
+    parser.add_argument('--profile', help="write cProfile stats for the whole run to this file")
+    parser.add_argument('--trace-memory', action='store_true', help="record each stage's tracemalloc peak")
+    args = parser.parse_args()
+
+    from run_report import RunReport, profiled
+
+    report = RunReport('etl', vars(args), trace_memory=args.trace_memory)
+    with profiled(args.profile):
+        # Load JSON data
+        with report.stage('read') as stage:
+            game_data = load_cleaned_data(args.input)
+            if isinstance(game_data, list):
+                stage.records = len(game_data)
+
+        if args.warehouse == 'embedded':
+            with report.stage('load_embedded') as stage:
+                total = len(game_data) if isinstance(game_data, list) else None
+                counts = embedded_etl_process(args.warehouse_path, stage.track(game_data, total=total))
+                print(f"Loaded {counts['new']} games into {args.warehouse_path}")
+                stage.rows = counts.pop('rows')
+                stage.counts.update(counts)
+        else:
+            # Connect to MySQL database
+            db = connect()
+
+            # The volume outlives schema changes, so catch it up with init.sql before loading
+            with report.stage('migrate_schema') as stage:
+                changes = ensure_schema(db)
+                for change in changes:
+                    print(f"Schema: {change}")
+                stage.counts['changes'] = changes
+
+            if args.defer_indexes:
+                with report.stage('drop_indexes'):
+                    drop_indexes(db)
+
+            # Run ETL process
+            with report.stage(f'load_{args.mode}') as stage:
+                total = len(game_data) if isinstance(game_data, list) else None
+                tracked_data = stage.track(game_data, total=total)
+                if args.mode == 'parallel':
+                    counts, worker_stats = parallel_etl_process(db, tracked_data, workers=args.workers,
+                                                                batch_size=args.batch_size,
+                                                                defer_fk_checks=args.defer_fk_checks)
+                    for stats in worker_stats:
+                        print(f"Worker {stats['worker']}: {stats['rows']} rows in {stats['seconds']:.2f}s "
+                              f"({stats['rows_per_second']:.0f} rows/s)")
+                    stage.counts['workers'] = worker_stats
+                elif args.mode in ('incremental', 'bulk'):
+                    counts = bulk_etl_process(db, tracked_data, batch_size=args.batch_size,
+                                              incremental=args.mode == 'incremental')
+                else:
+                    counts = etl_process(db, tracked_data)
+                print(f"Loaded {counts['new']} new and {counts['changed']} changed games, "
+                      f"{counts['unchanged']} unchanged")
+                stage.rows = counts.pop('rows')
+                stage.counts.update(counts)
+
+            # Build the query indexes once the data is in
+            if not args.skip_indexes:
+                with report.stage('create_indexes'):
+                    create_indexes(db)
+
+            # Close database connection
+            db.close()
+    report.write(args.report)
@@ -0,0 +1,120 @@
+import argparse
+import sys
+
+from etl import connect
+
+# the dashboard query shapes from server.py, with representative slider values
+dashboard_queries = [
+    {"description": "Roll Up (2010 - 2025)",
+     "query": """
+        SELECT
+            fgs.release_year AS year,
+            AVG(dg.metacritic_score) AS avg_metacritic_score,
+            SUM(fgs.recommendations) AS total_recommendations
+        FROM
+            fact_game_sales fgs
+        JOIN dim_game dg ON fgs.game_key = dg.game_key
+        WHERE
+            fgs.release_year BETWEEN 2010 AND 2025
+        GROUP BY
+            fgs.release_year
+        ORDER BY
+            fgs.release_year;
+     """},
+    {"description": "Drill Down (2022)",
+     "query": """
+        SELECT
+            fgs.release_year AS year,
+            dt.month,
+            COUNT(DISTINCT fgs.game_key) AS games_released,
+            AVG(dg.price) AS avg_price
+        FROM
+            fact_game_sales fgs
+        JOIN dim_game dg ON fgs.game_key = dg.game_key
+        JOIN dim_time dt ON fgs.time_key = dt.time_key
+        WHERE
+            fgs.release_year = 2022
+        GROUP BY
+            fgs.release_year, dt.month
+        ORDER BY
+            dt.month;
+     """},
+    {"description": "Slice and Dice (windows, $0 - $100)",
+     "query": """
+        SELECT
+            CASE
+                WHEN dg.price < 0 THEN 'Under $0'
+                WHEN dg.price >= 0 AND dg.price < 100 THEN '$0 - $100'
+                ELSE '$100 and above'
+            END AS price_range,
+            CASE
+                WHEN dg.metacritic_score < 50 THEN 'Low'
+                WHEN dg.metacritic_score >= 50 AND dg.metacritic_score < 75 THEN 'Medium'
+                ELSE 'High'
+            END AS metacritic_range,
+            COUNT(*) AS game_count
+        FROM
+            fact_game_sales fgs
+        JOIN dim_game dg ON fgs.game_key = dg.game_key
+        WHERE
+            fgs.platform_mask IN (1, 3, 5, 7)
+        GROUP BY
+            price_range, metacritic_range
+        ORDER BY
+            price_range, metacritic_range;
+     """},
+    {"description": "Pivot (2010 - 2025)",
+     "query": """
+        SELECT
+            fgs.release_year AS year,
+            fgs.platform_mask,
+            COUNT(*) AS game_count
+        FROM
+            fact_game_sales fgs
+        WHERE
+            fgs.release_year BETWEEN 2010 AND 2025
+        GROUP BY
+            fgs.release_year, fgs.platform_mask
+        ORDER BY
+            fgs.release_year, fgs.platform_mask;
+     """},
+]
+
+# conformed dimensions with only a handful of rows; scanning them is cheaper than any index
+SMALL_TABLES = {'dim_platform', 'dim_ownership'}
+
+
+def full_scans(db, query, allowed_tables=SMALL_TABLES):
+    """Runs EXPLAIN on a query and returns the plan rows that scan a whole table or index."""
+
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(f"EXPLAIN {query.strip().rstrip(';')}")
+    plan = cursor.fetchall()
+
+    # type ALL is a full table scan, type index a full index scan
+    return [row for row in plan
+            if row['type'] in ('ALL', 'index') and row['table'] not in allowed_tables]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report full scans in the dashboard query plans.")
+    parser.add_argument('--strict', action='store_true',
+                        help="also report full scans of the small platform and ownership dimensions")
+    args = parser.parse_args()
+
+    db = connect()
+    allowed_tables = set() if args.strict else SMALL_TABLES
+    found = False
+
+    for test_case in dashboard_queries:
+        scans = full_scans(db, test_case['query'], allowed_tables)
+        if scans:
+            found = True
+            print(f"FULL SCAN  {test_case['description']}")
+            for row in scans:
+                print(f"    table={row['table']} type={row['type']} key={row['key']} rows={row['rows']} extra={row['Extra']}")
+        else:
+            print(f"ok         {test_case['description']}")
+
+    db.close()
+    sys.exit(1 if found else 0)
@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# production entry point for the dashboard: gunicorn -c gunicorn.conf.py
+wsgi_app = 'server:create_app()'
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+
+# the parent only imports the code, running no queries; every worker warms up its own data after the
+# fork, so the sql backend's caches are per worker, and only cube snapshots are shared (DASHBOARD_CUBE_DIR)
+preload_app = True
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('DASHBOARD_THREADS', 4))
+
+# one pooled connection per worker thread, plus one per background thread that queries, so those never
+# leave a request waiting for a connection: the load version poller, server.py's warm-up (a thread per
+# server-side callback) and, in approximate mode, the background exact queries
+warmup_tasks = 4
+exact_workers = int(os.environ.setdefault('DASHBOARD_EXACT_WORKERS', '2'))
+approximate = os.environ.get('DASHBOARD_APPROXIMATE', '0') == '1'
+background = 1 + warmup_tasks + (exact_workers if approximate else 0)
+os.environ.setdefault('DASHBOARD_POOL_SIZE', str(threads + background))
+os.environ.setdefault('DASHBOARD_POOL_MAX_OVERFLOW', '0')
+
+# workers map reloaded cube snapshots from here rather than each keeping a private copy
+os.environ.setdefault('DASHBOARD_CUBE_DIR', os.path.join(tempfile.gettempdir(), 'steam-dashboard-cube'))
+# each worker saves its metrics here, so /metrics answers for all of them whichever one takes the scrape
+metrics_dir = os.environ.get('DASHBOARD_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'steam-dashboard-metrics'))
+
+
+def on_starting(server):
+    # the last run's workers are gone; their counts would otherwise be added to this run's
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def post_fork(server, worker):
+    # drop any connections inherited from the parent without closing them under its feet
+    import metrics
+    from server import warehouse, warmup
+    warehouse.dispose(close=False)
+    metrics.share(metrics_dir)
+    warmup.start()
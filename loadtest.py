@@ -0,0 +1,226 @@
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from metrics import percentile
+
+# the dashboard's server-side callbacks in server.py, as the browser addresses them
+CALLBACKS = {
+    'roll_up': {'outputs': [('roll-up-graph', 'figure')], 'inputs': ['roll-up-year-slider', 'roll-up-preset']},
+    'drill_down': {'outputs': [('drill-down-data', 'data')], 'inputs': ['drill-down-year-slider']},
+    'slice_dice': {'outputs': [('slice-dice-graph', 'figure'), ('slice-dice-exact-poll', 'disabled')],
+                   'inputs': ['slice-dice-platform', 'slice-dice-price-range', ('slice-dice-exact-poll', 'n_intervals')]},
+    'pivot': {'outputs': [('pivot-data', 'data')], 'inputs': ['pivot-year-slider']},
+}
+
+# controls whose callbacks run in the browser; changing them sends no request
+CLIENT_ONLY = {'drill-down-metric', 'pivot-view'}
+
+# control values when the page first loads, as set in server.py's layout
+INITIAL_VALUES = {
+    'roll-up-year-slider': [2010, 2026],
+    'roll-up-preset': 'all_time',
+    'drill-down-year-slider': 2025,
+    'drill-down-metric': 'games_released',
+    'slice-dice-platform': 'windows',
+    'slice-dice-price-range': [0, 100],
+    'pivot-year-slider': [2010, 2025],
+    'pivot-view': 'stack',
+    'slice-dice-exact-poll': None,
+}
+
+YEARS = list(range(2010, 2026))
+PRICES = list(range(0, 101, 5))  # the slider's steps, see --price-step
+
+
+def _year_range(rng):
+    return sorted(rng.sample(YEARS, 2))
+
+
+def _price_range(rng):
+    return sorted(rng.sample(PRICES, 2))
+
+
+# what an analyst does on each tab, keyed by the callback it triggers: (control, new value)
+TAB_ACTIONS = {
+    'roll_up': [
+        lambda rng: ('roll-up-year-slider', _year_range(rng)),
+        lambda rng: ('roll-up-preset', rng.choice(['last_5', 'last_10', 'all_time'])),
+    ],
+    'drill_down': [
+        lambda rng: ('drill-down-year-slider', rng.choice(YEARS)),
+        lambda rng: ('drill-down-metric', rng.choice(['games_released', 'avg_price'])),
+    ],
+    'slice_dice': [
+        lambda rng: ('slice-dice-platform', rng.choice(['windows', 'mac', 'linux'])),
+        lambda rng: ('slice-dice-price-range', _price_range(rng)),
+    ],
+    'pivot': [
+        lambda rng: ('pivot-year-slider', _year_range(rng)),
+        lambda rng: ('pivot-view', rng.choice(['stack', 'group'])),
+    ],
+}
+
+
+def update_component_payload(callback, values, changed=None):
+    """Request body the Dash renderer posts to /_dash-update-component for one callback.
+
+    Inputs are control ids, whose value property is read, or (id, property) pairs.
+    """
+    outputs = [{'id': component_id, 'property': prop} for component_id, prop in CALLBACKS[callback]['outputs']]
+    names = [f'{component_id}.{prop}' for component_id, prop in CALLBACKS[callback]['outputs']]
+    inputs = [input_id if isinstance(input_id, tuple) else (input_id, 'value')
+              for input_id in CALLBACKS[callback]['inputs']]
+    return {
+        'output': f"..{'...'.join(names)}.." if len(names) > 1 else names[0],
+        'outputs': outputs if len(outputs) > 1 else outputs[0],
+        'inputs': [{'id': input_id, 'property': prop, 'value': values[input_id]} for input_id, prop in inputs],
+        'changedPropIds': [f'{changed}.value'] if changed else [],
+        'state': [],
+    }
+
+
+class Stats:
+    """Latencies and response sizes per callback, shared by all virtual users."""
+
+    def __init__(self):
+        self.latencies = {callback: [] for callback in CALLBACKS}
+        self.bytes = {callback: 0 for callback in CALLBACKS}
+        self.errors = {callback: 0 for callback in CALLBACKS}
+        self._lock = threading.Lock()
+
+    def record(self, callback, latency, size, ok):
+        with self._lock:
+            if ok:
+                self.latencies[callback].append(latency)
+                self.bytes[callback] += size
+            else:
+                self.errors[callback] += 1
+
+    def report(self, duration):
+        report = {}
+        for callback, samples in self.latencies.items():
+            result = {'requests': len(samples), 'errors': self.errors[callback],
+                      'rps': len(samples) / duration if duration > 0 else None}
+            if samples:
+                result.update({
+                    'mean': statistics.mean(samples),
+                    'stddev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                    'p50': percentile(samples, 50),
+                    'p95': percentile(samples, 95),
+                    'p99': percentile(samples, 99),
+                    'max': max(samples),
+                    'avg_response_bytes': self.bytes[callback] / len(samples),
+                })
+            report[callback] = result
+        return report
+
+
+class VirtualUser(threading.Thread):
+    """One analyst: loads the dashboard, then clicks through a tab's controls with pauses in between.
+
+    Keeps one keep-alive HTTP connection, like a browser tab, and the current value of every control,
+    so each callback is sent the same inputs the real page would send.
+    """
+
+    def __init__(self, url, stats, deadline, think_time, seed=None):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.path = parts.path.rstrip('/') + '/_dash-update-component'
+        self.stats = stats
+        self.deadline = deadline
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.connection = None
+
+    def call(self, callback, values, changed=None):
+        body = json.dumps(update_component_payload(callback, values, changed))
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+            response = self.connection.getresponse()
+            size = len(response.read())
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            size, ok = 0, False
+        self.stats.record(callback, time.perf_counter() - start, size, ok)
+
+    def pause(self):
+        low, high = self.think_time
+        time.sleep(self.rng.uniform(low, high))
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            # a page load fires every callback with the initial values
+            values = dict(INITIAL_VALUES)
+            for callback in CALLBACKS:
+                self.call(callback, values)
+
+            for _ in range(self.rng.randint(3, 8)):
+                if time.monotonic() >= self.deadline:
+                    break
+                self.pause()
+                callback = self.rng.choice(list(TAB_ACTIONS))
+                control, value = self.rng.choice(TAB_ACTIONS[callback])(self.rng)
+                values[control] = value
+                if control not in CLIENT_ONLY:
+                    self.call(callback, values, changed=control)
+        if self.connection is not None:
+            self.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the dashboard callbacks of a running server.py.")
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--users', type=int, default=10, help="concurrent virtual users")
+    parser.add_argument('--duration', type=float, default=60, help="seconds to run for")
+    parser.add_argument('--ramp-up', type=float, default=5, help="seconds over which users are started")
+    parser.add_argument('--think-time', type=float, nargs=2, default=(0.5, 2.0), metavar=('MIN', 'MAX'),
+                        help="seconds a user pauses between interactions")
+    parser.add_argument('--seed', type=int, help="makes the interaction sequences reproducible")
+    parser.add_argument('--output', help="write the report as JSON")
+    parser.add_argument('--price-step', type=int, default=5,
+                        help="price slider step; 1 against a server in approximate mode (DASHBOARD_APPROXIMATE=1)")
+    args = parser.parse_args()
+    PRICES = list(range(0, 101, args.price_step))
+
+    stats = Stats()
+    start = time.monotonic()
+    deadline = start + args.duration
+    users = [VirtualUser(args.url, stats, deadline, args.think_time,
+                         seed=None if args.seed is None else args.seed + index)
+             for index in range(args.users)]
+    for user in users:
+        user.start()
+        time.sleep(args.ramp_up / max(len(users), 1))
+    for user in users:
+        user.join()
+    duration = time.monotonic() - start
+
+    report = stats.report(duration)
+    for callback, result in report.items():
+        if result['requests']:
+            print(f"{callback:<11} {result['requests']:6d} req  {result['rps']:7.1f} req/s  "
+                  f"p50 {result['p50'] * 1000:8.1f} ms  p95 {result['p95'] * 1000:8.1f} ms  "
+                  f"p99 {result['p99'] * 1000:8.1f} ms  {result['errors']} errors")
+        else:
+            print(f"{callback:<11} no successful requests, {result['errors']} errors")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'url': args.url, 'users': args.users, 'duration': duration, 'callbacks': report}, f, indent=4)
+        print(f"Load test results written to {args.output}")
+
+    sys.exit(1 if any(result['errors'] for result in report.values()) else 0)
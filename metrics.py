@@ -0,0 +1,261 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+BYTES_BUCKETS = (1000, 10000, 100000, 1000000, 10000000)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of timings."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, values)) + '}'
+
+
+class Histogram:
+    """Prometheus histogram with fixed buckets, keyed by label values."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labelvalues: list(values) for labelvalues, values in self._series.items()}
+
+    @staticmethod
+    def merge(series, other):
+        for labelvalues, values in other.items():
+            if labelvalues in series:
+                series[labelvalues] = [a + b for a, b in zip(series[labelvalues], values)]
+            else:
+                series[labelvalues] = list(values)
+
+    def expose(self, series=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        if series is None:
+            series = self.snapshot()
+        for labelvalues, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _labels(self.labelnames + ('le',), labelvalues + (repr(float(bound)),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f'{self.name}_bucket{_labels(self.labelnames + ("le",), labelvalues + ("+Inf",))} {values[-1]}')
+            lines.append(f'{self.name}_sum{labels} {values[-2]}')
+            lines.append(f'{self.name}_count{labels} {values[-1]}')
+        return '\n'.join(lines)
+
+
+class Counter:
+    """Prometheus counter keyed by label values."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(values, other):
+        for labelvalues, value in other.items():
+            values[labelvalues] = values.get(labelvalues, 0) + value
+
+    def expose(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        if values is None:
+            values = self.snapshot()
+        for labelvalues, value in sorted(values.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, labelvalues)} {value}')
+        return '\n'.join(lines)
+
+
+callback_seconds = Histogram('dashboard_callback_seconds',
+                             'Time from a callback starting to its response being ready, serialization included.',
+                             ('callback',))
+phase_seconds = Histogram('dashboard_callback_phase_seconds',
+                          'Time spent in each phase of a callback: sql, dataframe, cube, sample or figure.',
+                          ('callback', 'phase'))
+sql_rows = Histogram('dashboard_callback_sql_rows', 'Rows fetched from the database per callback.',
+                     ('callback',), ROWS_BUCKETS)
+response_bytes = Histogram('dashboard_callback_response_bytes', 'Size of the serialized callback response.',
+                           ('callback',), BYTES_BUCKETS)
+cache_lookups = Counter('dashboard_callback_cache_total',
+                        'Query cache lookups per callback and result: hit, miss or approximate.',
+                        ('callback', 'result'))
+REGISTRY = [callback_seconds, phase_seconds, sql_rows, response_bytes, cache_lookups]
+
+
+# set by share(): every process saves its series here, and expose() adds up all of them
+shared_dir = None
+shared_name = None  # this process's file there; not just the pid, which a later worker may get again
+SHARE_INTERVAL = 1.0  # seconds between saves, so a scrape can lag the other processes by about this much
+
+
+def share(directory, interval=SHARE_INTERVAL):
+    """Makes this process's metrics part of every scrape of the processes sharing directory.
+
+    For a pre-forking server, where each scrape reaches one worker of many: call it in every worker,
+    after the fork, and empty directory before starting them. A worker that exits leaves its last
+    save behind, so the totals never go down.
+    """
+    global shared_dir, shared_name
+    shared_dir = directory
+    shared_name = f'{os.getpid()}-{time.time_ns()}.json'
+    os.makedirs(directory, exist_ok=True)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            save()
+    threading.Thread(target=run, name='metrics-share', daemon=True).start()
+
+
+def save():
+    """Writes this process's series to shared_dir, replacing its last save."""
+    path = os.path.join(shared_dir, shared_name)
+    staging = f'{path}.tmp'
+    with open(staging, 'w') as f:
+        json.dump({metric.name: [[list(labelvalues), values] for labelvalues, values in metric.snapshot().items()]
+                   for metric in REGISTRY}, f)
+    os.replace(staging, path)
+
+
+def expose():
+    """All metrics in the Prometheus text exposition format, summed over the processes sharing them."""
+    series = {metric.name: metric.snapshot() for metric in REGISTRY}
+    if shared_dir is not None:
+        for name in os.listdir(shared_dir):
+            if not name.endswith('.json') or name == shared_name:
+                continue
+            try:
+                with open(os.path.join(shared_dir, name), 'r') as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                continue  # removed or replaced under us; the next scrape has it
+            for metric in REGISTRY:
+                metric.merge(series[metric.name], {tuple(labelvalues): values
+                                                   for labelvalues, values in saved.get(metric.name, [])})
+    return '\n'.join(metric.expose(series[metric.name]) for metric in REGISTRY) + '\n'
+
+
+slow_log = logging.getLogger('dashboard.slow')
+
+
+class CallbackTrace:
+    """What one callback invocation spent its time on, filled in by the code it calls."""
+
+    def __init__(self, callback, params):
+        self.callback = callback
+        self.params = params
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.rows = 0
+        self.cache = None  # 'hit', 'miss' or 'approximate' when the query cache was consulted
+        self.response_bytes = None
+        self.finished = False
+
+    def add_phase(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def finish(self, slow_threshold):
+        if self.finished:
+            return
+        self.finished = True
+        total = time.perf_counter() - self.start
+        callback_seconds.observe(total, self.callback)
+        for phase, seconds in self.phases.items():
+            phase_seconds.observe(seconds, self.callback, phase)
+        if 'sql' in self.phases:
+            sql_rows.observe(self.rows, self.callback)
+        if self.response_bytes is not None:
+            response_bytes.observe(self.response_bytes, self.callback)
+        if self.cache is not None:
+            cache_lookups.inc(self.callback, self.cache)
+
+        if total >= slow_threshold:
+            slow_log.warning(json.dumps({
+                'callback': self.callback, 'params': self.params, 'seconds': round(total, 4),
+                'phases': {phase: round(seconds, 4) for phase, seconds in self.phases.items()},
+                'rows': self.rows, 'cache': self.cache, 'response_bytes': self.response_bytes,
+            }, default=str))
+
+
+current_trace = ContextVar('current_trace', default=None)
+
+
+class phase:
+    """Times a block as one phase of the current callback; does nothing outside a callback."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = current_trace.get()
+        self.start = time.perf_counter()
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            self.trace.add_phase(self.name, time.perf_counter() - self.start)
+
+
+def traced(callback, on_trace=None, slow_threshold=0.5):
+    """Decorates a callback so each call gets a CallbackTrace.
+
+    on_trace(trace) may take over the trace (the server hands it to Flask so the response size can be
+    added before it is recorded) and returns True if it did; otherwise it is recorded right away.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            trace = CallbackTrace(callback, args)
+            token = current_trace.set(trace)
+            try:
+                return func(*args)
+            finally:
+                current_trace.reset(token)
+                if on_trace is None or not on_trace(trace):
+                    trace.finish(slow_threshold)
+        return wrapper
+    return decorator
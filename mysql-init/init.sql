@@ -9,43 +9,132 @@ CREATE TABLE dim_game (
     required_age INT,
     price DECIMAL(10, 2),
     metacritic_score INT,
-    achievements INT
+    achievements INT,
+    content_hash CHAR(40),
+    batch_id INT,
+    UNIQUE (game_id)
 );
 
 CREATE TABLE dim_platform (
-    platform_key INT AUTO_INCREMENT PRIMARY KEY,
+    platform_key TINYINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
     windows BOOLEAN,
     mac BOOLEAN,
-    linux BOOLEAN
+    linux BOOLEAN,
+    UNIQUE (windows, mac, linux)
 );
 
 CREATE TABLE dim_time (
-    time_key INT AUTO_INCREMENT PRIMARY KEY,
+    time_key SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
     release_date DATE,
     year INT,
     month INT,
-    day INT
+    day INT,
+    UNIQUE (release_date)
 );
 
 CREATE TABLE dim_ownership (
-    ownership_key INT AUTO_INCREMENT PRIMARY KEY,
+    ownership_key SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
     estimated_owners_min INT,
-    estimated_owners_max INT
+    estimated_owners_max INT,
+    UNIQUE (estimated_owners_min, estimated_owners_max)
 );
 
 -- Fact Table
+-- Partitioned by release year, which the dashboard filters on, so MySQL only reads the years asked for.
+-- Partitioned InnoDB tables can't have foreign keys, so etl.py checks them after every load
+-- (check_foreign_keys), and every unique key has to include release_year.
 CREATE TABLE fact_game_sales (
-    game_key INT,
-    platform_key INT,
-    time_key INT,
-    ownership_key INT,
-    recommendations INT,
-    positive_reviews INT,
-    negative_reviews INT,
-    average_playtime_forever INT,
-    peak_ccu INT,
-    FOREIGN KEY (game_key) REFERENCES dim_game(game_key),
-    FOREIGN KEY (platform_key) REFERENCES dim_platform(platform_key),
-    FOREIGN KEY (time_key) REFERENCES dim_time(time_key),
-    FOREIGN KEY (ownership_key) REFERENCES dim_ownership(ownership_key)
+    game_key INT NOT NULL,
+    platform_key TINYINT UNSIGNED,
+    platform_mask TINYINT UNSIGNED NOT NULL,  -- dim_platform's flags as bits: windows = 1, mac = 2, linux = 4
+    time_key SMALLINT UNSIGNED,
+    release_year SMALLINT UNSIGNED NOT NULL,  -- dim_time.year, copied here to partition on
+    ownership_key SMALLINT UNSIGNED,
+    recommendations INT UNSIGNED,
+    positive_reviews INT UNSIGNED,
+    negative_reviews INT UNSIGNED,
+    average_playtime_forever MEDIUMINT UNSIGNED,
+    peak_ccu MEDIUMINT UNSIGNED,
+    PRIMARY KEY (game_key, release_year)
+)
+ROW_FORMAT = COMPRESSED KEY_BLOCK_SIZE = 8
+PARTITION BY RANGE (release_year) (
+    PARTITION p_before_2006 VALUES LESS THAN (2006),
+    PARTITION p2006 VALUES LESS THAN (2007),
+    PARTITION p2007 VALUES LESS THAN (2008),
+    PARTITION p2008 VALUES LESS THAN (2009),
+    PARTITION p2009 VALUES LESS THAN (2010),
+    PARTITION p2010 VALUES LESS THAN (2011),
+    PARTITION p2011 VALUES LESS THAN (2012),
+    PARTITION p2012 VALUES LESS THAN (2013),
+    PARTITION p2013 VALUES LESS THAN (2014),
+    PARTITION p2014 VALUES LESS THAN (2015),
+    PARTITION p2015 VALUES LESS THAN (2016),
+    PARTITION p2016 VALUES LESS THAN (2017),
+    PARTITION p2017 VALUES LESS THAN (2018),
+    PARTITION p2018 VALUES LESS THAN (2019),
+    PARTITION p2019 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p_later VALUES LESS THAN MAXVALUE
+);
+
+-- ETL load history; the latest finished batch is the load watermark
+CREATE TABLE etl_batch (
+    batch_id INT AUTO_INCREMENT PRIMARY KEY,
+    mode VARCHAR(16),
+    started_at DATETIME,
+    finished_at DATETIME,
+    games_new INT,
+    games_changed INT,
+    games_unchanged INT
+);
+
+-- Summary tables for the dashboard, rebuilt by etl.py after every load.
+-- platform_mask as on fact_game_sales; price_bucket: $5 steps, $100 and up in one bucket
+CREATE TABLE agg_year (
+    year INT PRIMARY KEY,
+    game_count INT,
+    sum_metacritic_score BIGINT,
+    metacritic_count INT,
+    total_recommendations BIGINT
+);
+
+CREATE TABLE agg_year_month (
+    year INT,
+    month INT,
+    games_released INT,
+    sum_price DECIMAL(16, 2),
+    price_count INT,
+    PRIMARY KEY (year, month)
+);
+
+CREATE TABLE agg_platform_year (
+    year INT,
+    platform_mask TINYINT,
+    game_count INT,
+    KEY (year, platform_mask)
+);
+
+CREATE TABLE agg_price_metacritic_platform (
+    price_bucket INT,
+    metacritic_range VARCHAR(6),
+    platform_mask TINYINT,
+    game_count INT,
+    KEY (platform_mask)
+);
+
+-- Approximate-mode table, also rebuilt by etl.py (see SAMPLE_PER_STRATUM there)
+CREATE TABLE sample_game_sales (
+    year INT,
+    month INT,
+    price DECIMAL(10, 2),
+    metacritic_score INT,
+    platform_mask TINYINT,
+    stratum_size INT,
+    KEY (year, month)
 );
@@ -0,0 +1,207 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+from cleanup import CLEANING_ENGINES, COLUMNAR_SUFFIX
+from warehouse import EMBEDDED_PATH, WAREHOUSES, open_warehouse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = 'dataset/pipeline_manifest.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+# everything etl.py runs: its schema, the warehouse drivers and the columnar reader it imports
+LOAD_CODE = ['etl.py', 'mysql-init/init.sql', 'warehouse.py', 'cleanup.py']
+
+loaded_batch_query = "SELECT MAX(batch_id) FROM etl_batch WHERE finished_at IS NOT NULL"
+
+
+def file_stats(path):
+    """Lists (relative path, size, mtime) for a file or for every file under a directory, in a fixed order."""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [('', stat.st_size, stat.st_mtime_ns)]
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            stat = os.stat(full_path)
+            entries.append((os.path.relpath(full_path, path), stat.st_size, stat.st_mtime_ns))
+    return entries
+
+
+def fingerprint(path, previous=None):
+    """SHA-256 of a file, or of a directory's file names and contents, as {'sha256', 'stat'}.
+
+    When the sizes and modification times match previous, its hash is reused instead of reading
+    everything again; a touched but unchanged file is re-read and still hashes the same.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = [list(entry) for entry in file_stats(path)]
+    if previous and previous.get('stat') == stat:
+        return previous
+    digest = hashlib.sha256()
+    for name, _, _ in stat:
+        digest.update(name.encode('utf-8') + b'\0')
+        with open(os.path.join(path, name) if name else path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return {'sha256': digest.hexdigest(), 'stat': stat}
+
+
+def same_content(previous, current):
+    """Whether two fingerprints are of the same content, whatever the file times."""
+    return bool(previous) and current is not None and previous['sha256'] == current['sha256']
+
+
+def code_version(*scripts):
+    """The cleaning (or loading) code version: a hash of the source of the scripts it runs."""
+    digest = hashlib.sha256()
+    for script in scripts:
+        with open(os.path.join(HERE, script), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def loaded_batch(warehouse):
+    """The latest finished ETL batch in the warehouse, or None if it is empty or unreachable."""
+    try:
+        _, rows = warehouse.execute(loaded_batch_query)
+    except warehouse.Error:
+        return None
+    return rows[0][0] if rows else None
+
+
+def check_cleaned(path):
+    """Raises RuntimeError unless path holds a complete cleaned output, not what a failed clean left."""
+    try:
+        if path.endswith(COLUMNAR_SUFFIX):
+            # schema.json is written last, and names how many rows every column file holds
+            with open(os.path.join(path, 'schema.json'), 'r') as f:
+                schema = json.load(f)
+            for column in schema['columns']:
+                if not os.path.exists(os.path.join(path, f'{column}.valid.bin')):
+                    raise ValueError(f"column {column} is missing")
+            return
+        with open(path, 'rb') as f:
+            head = f.read(1)
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 1, 0))
+            tail = f.read(1)
+        # a JSON array written to the end; a CSV just needs its header
+        if not head or (path.endswith('.json') and (head, tail) != (b'[', b']')):
+            raise ValueError("incomplete file")
+    except (OSError, ValueError, KeyError) as e:
+        raise RuntimeError(f"cleanup.py did not write a complete {path}: {e}") from e
+
+
+class Manifest:
+    """What each stage's last successful run was given and produced, saved as JSON after every stage."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stages = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.stages = json.load(f).get('stages', {})
+
+    def get(self, stage):
+        return self.stages.get(stage, {})
+
+    def record(self, stage, entry):
+        self.stages[stage] = dict(entry, finished_at=datetime.now().isoformat(timespec='seconds'))
+        self.save()
+
+    def refresh(self, stage, **fingerprints):
+        """Stores the current file times of a skipped stage's inputs, so the next run needn't hash them again."""
+        if any(self.stages[stage].get(key) != value for key, value in fingerprints.items()):
+            self.stages[stage].update(fingerprints)
+            self.save()
+
+    def save(self):
+        staging = f'{self.path}.tmp'
+        with open(staging, 'w') as f:
+            json.dump({'stages': self.stages}, f, indent=4)
+        os.replace(staging, self.path)
+
+
+def run_script(script, *args):
+    print(f"Running {script} {' '.join(args)}", flush=True)
+    subprocess.run([sys.executable, os.path.join(HERE, script), *args], check=True)
+
+
+def run_clean(manifest, source, cleaned, engine='python', force=False):
+    """Cleans source into cleaned unless the source, the cleaning code and the cleaned output are all
+    what the last successful run left behind. Returns whether it ran."""
+
+    previous = manifest.get('clean')
+    source_hash = fingerprint(source, previous.get('source'))
+    if source_hash is None:
+        raise FileNotFoundError(f"Source dataset {source} not found")
+    inputs = {'source': source_hash, 'code_version': code_version('cleanup.py'), 'output_path': cleaned}
+    output_hash = fingerprint(cleaned, previous.get('output'))
+
+    if (not force and same_content(previous.get('source'), source_hash) and same_content(previous.get('output'), output_hash)
+            and previous.get('code_version') == inputs['code_version'] and previous.get('output_path') == cleaned):
+        print(f"clean: skipped, {source} and cleanup.py are unchanged and {cleaned} is as last written")
+        manifest.refresh('clean', source=source_hash, output=output_hash)
+        return False
+
+    run_script('cleanup.py', '--input', source, '--output', cleaned, '--engine', engine)
+    check_cleaned(cleaned)
+    manifest.record('clean', dict(inputs, output=fingerprint(cleaned)))
+    return True
+
+
+def run_load(manifest, cleaned, warehouse_name, warehouse_path, force=False):
+    """Loads cleaned into the warehouse unless the same cleaned output, by the same load code, is already
+    its latest load.
+
+    The warehouse's load watermark has to match the batch recorded here too, so a warehouse that was
+    wiped or loaded from elsewhere since is loaded again. Returns whether it ran.
+    """
+
+    warehouse = open_warehouse(warehouse_name, warehouse_path)
+    target = warehouse_name if warehouse_name == 'mysql' else f'{warehouse_name}:{warehouse_path}'
+    stage = f'load {target}'  # each warehouse keeps its own record, so loading one doesn't reload the other
+    previous = manifest.get(stage)
+    inputs = {'input': fingerprint(cleaned, manifest.get('clean').get('output')), 'code_version': code_version(*LOAD_CODE)}
+
+    if (not force and same_content(previous.get('input'), inputs['input'])
+            and previous.get('code_version') == inputs['code_version']
+            and previous.get('batch_id') is not None and loaded_batch(warehouse) == previous['batch_id']):
+        print(f"load: skipped, batch {previous['batch_id']} in {target} already holds {cleaned} and the load code is unchanged")
+        manifest.refresh(stage, input=inputs['input'])
+        return False
+
+    run_script('etl.py', '--input', cleaned, '--warehouse', warehouse_name, '--warehouse-path', warehouse_path)
+    warehouse.dispose()
+    manifest.record(stage, dict(inputs, batch_id=loaded_batch(warehouse)))
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run cleanup.py and etl.py, skipping the stages whose inputs "
+                                                 "are unchanged since their last successful run.")
+    parser.add_argument('--input', default='dataset/games.json')
+    parser.add_argument('--cleaned', default='dataset/cleaned_games.columns')
+    parser.add_argument('--clean-engine', choices=CLEANING_ENGINES + ('stream',), default='python',
+                        help="cleanup.py --engine; stream only for a source too large to load into memory")
+    parser.add_argument('--warehouse', choices=WAREHOUSES, default=os.environ.get('WAREHOUSE', 'mysql'))
+    parser.add_argument('--warehouse-path', default=os.environ.get('WAREHOUSE_PATH', EMBEDDED_PATH))
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    parser.add_argument('--force', action='store_true', help="run every stage even if nothing changed")
+    args = parser.parse_args()
+
+    manifest = Manifest(args.manifest)
+    try:
+        # each stage compares what it is given now, so a clean that rewrote identical output skips the load
+        run_clean(manifest, args.input, args.cleaned, engine=args.clean_engine, force=args.force)
+        run_load(manifest, args.cleaned, args.warehouse, args.warehouse_path, force=args.force)
+    except (subprocess.CalledProcessError, FileNotFoundError, RuntimeError) as e:
+        print(f"Pipeline failed: {e}")
+        sys.exit(1)
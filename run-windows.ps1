@@ -1,8 +1,8 @@
 # Copy the original dataset from the Downloads directory to the local directory
 Copy-Item "$HOME\Downloads\games.json" -Destination ".\dataset\games.json"
 
-# Run the Docker container to the database
-docker-compose down -v
+# Run the Docker container to the database; its volume is kept between runs, so the pipeline
+# only reloads what changed (docker-compose down -v starts over from an empty database)
 docker-compose up -d --build
 
 # Wait for the database to be ready
@@ -15,16 +15,22 @@ python -m venv venv
 # Install dependencies
 pip install -r .\dependencies.txt
 
-# Run the pipeline
-python cleanup.py
-python etl.py
+# Run the pipeline: cleanup.py then etl.py, skipping either if its inputs are unchanged since the last run
+python pipeline.py
+
+# Check the dashboard query plans for full scans
+python explain.py
 
 # Run the tests c 
 python test.py
 
+# The same queries on an embedded warehouse file, which needs no database server, compared to MySQL
+python pipeline.py --warehouse embedded
+python test.py --warehouse embedded --output dataset/test_results_embedded.json --baseline dataset/test_results.json
+
 # Run the server
 python server.py
 
-# Clean up
-docker-compose down -v
+# Clean up, keeping the database volume for the next run
+docker-compose down
 Remove-Item -Recurse -Force .\venv
@@ -1,8 +1,9 @@
 # copy the original dataset from the downloads directory to the local directory
-cp ~/Downloads/games.json ./dataset/games.json
+# (-p keeps its modification time, so the pipeline doesn't hash an unchanged file again)
+cp -p ~/Downloads/games.json ./dataset/games.json
 
-# run the docker container to the database
-docker-compose down -v
+# run the docker container to the database; its volume is kept between runs, so the pipeline
+# only reloads what changed (docker-compose down -v starts over from an empty database)
 docker-compose up -d --build
 
 # wait for the database to be ready
@@ -15,17 +16,23 @@ source venv/bin/activate
 # install dependencies
 pip3 install -r dependencies.txt
 
-# run the pipeline
-python3 cleanup.py
-python3 etl.py
+# run the pipeline: cleanup.py then etl.py, skipping either if its inputs are unchanged since the last run
+python3 pipeline.py
+
+# check the dashboard query plans for full scans
+python3 explain.py
 
 # run the tests
 python3 test.py
 
-# run the server
-python3 server.py
+# the same queries on an embedded warehouse file, which needs no database server, compared to MySQL
+python3 pipeline.py --warehouse embedded
+python3 test.py --warehouse embedded --output dataset/test_results_embedded.json --baseline dataset/test_results.json
+
+# run the server with one worker per core; python3 server.py runs the single-process debug server
+gunicorn -c gunicorn.conf.py
 
 
-# clean up
-docker-compose down -v
+# clean up, keeping the database volume for the next run
+docker-compose down
 rm -rf venv 
@@ -0,0 +1,136 @@
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROGRESS_INTERVAL = 5.0  # seconds between progress lines
+
+
+class Stage:
+    """Counters for one stage of a pipeline run: records processed, why any were skipped, rows per table."""
+
+    def __init__(self, name):
+        self.name = name
+        self.records = 0
+        self.skipped = Counter()  # reason -> records
+        self.counts = {}  # anything else worth reporting, e.g. parsed, new, changed
+        self.rows = {}  # table -> rows written
+        self.seconds = 0.0
+        self.peak_memory = None
+        self.error = None  # why the stage failed, if it did
+        self._start = time.perf_counter()
+        self._last_progress = self._start
+
+    def track(self, iterable, total=None):
+        """Passes the items of iterable through, counting them and printing progress as it goes."""
+        for item in iterable:
+            self.records += 1
+            now = time.perf_counter()
+            if now - self._last_progress >= PROGRESS_INTERVAL:
+                self._last_progress = now
+                self.print_progress(now, total)
+            yield item
+
+    def print_progress(self, now, total=None):
+        elapsed = now - self._start
+        rate = self.records / elapsed if elapsed else 0.0
+        line = f"[{self.name}] {self.records} records, {rate:.0f}/s"
+        if total and rate:
+            line += f", {self.records / total:.0%}, ETA {(total - self.records) / rate:.0f}s"
+        print(line, flush=True)
+
+    def as_dict(self):
+        per_second = (lambda count: count / self.seconds if self.seconds else None)
+        return {
+            'seconds': self.seconds,
+            'records': self.records,
+            'records_per_second': per_second(self.records),
+            'skipped': dict(self.skipped),
+            **self.counts,
+            'rows': {table: {'rows': rows, 'rows_per_second': per_second(rows)} for table, rows in self.rows.items()},
+            'peak_memory_bytes': self.peak_memory,
+            'error': self.error,
+        }
+
+
+class RunReport:
+    """Per-stage metrics of one cleanup.py or etl.py run, written out as JSON at the end.
+
+    With trace_memory=True each stage also records its tracemalloc peak. Tracing slows allocation-heavy
+    code down noticeably, so it is opt-in; the process's peak RSS is always reported where available.
+    """
+
+    def __init__(self, script, settings, trace_memory=False):
+        self.script = script
+        self.settings = settings
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        if trace_memory:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        stage = Stage(name)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        try:
+            yield stage
+        except BaseException as e:
+            stage.error = repr(e)
+            raise
+        finally:
+            stage.seconds = time.perf_counter() - stage._start
+            if self.trace_memory:
+                stage.peak_memory = tracemalloc.get_traced_memory()[1]
+            self.stages.append(stage)
+            outcome = 'failed' if stage.error else 'done'
+            print(f"[{name}] {outcome}: {stage.records} records in {stage.seconds:.2f}s", flush=True)
+
+    def as_dict(self):
+        return {
+            'script': self.script,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'seconds': time.perf_counter() - self._start,
+            'settings': self.settings,
+            'max_rss_bytes': max_rss_bytes(),
+            'stages': {stage.name: stage.as_dict() for stage in self.stages},
+        }
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=4, default=str)
+        print(f"Run report written to {path}")
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024  # macOS reports bytes, Linux KiB
+
+
+@contextmanager
+def profiled(path):
+    """Runs the block under cProfile and writes the stats to path (for pstats or snakeviz); no-op without a path."""
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}")
@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from cleanup import KEPT_FIELDS, PLATFORM_FIELDS, clean_game, iter_raw_games, write_cleaned_data_to_file
+
+# counts that are scaled by random noise, so a 1000x file doesn't repeat the same few values
+COUNT_FIELDS = ['achievements', 'recommendations', 'positive', 'negative', 'average_playtime_forever', 'peak_ccu']
+
+SAMPLE_SIZE = 100000  # observed values kept per field while learning
+JITTER_DAYS = 90  # generated release dates land within this many days of an observed one
+COUNT_SPREAD = 0.5  # sigma of the log-normal noise applied to counts
+RELEASE_DATE_FORMAT = '%b %d, %Y'  # as in games.json, and as parsed by cleanup.clean_game
+PADDING_FIELD = 'detailed_description'  # carries the bytes of the fields cleanup.py skips
+PADDING_TEXT = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. '
+
+_MISSING = object()  # a field that was absent from the source record
+
+
+class _Reservoir:
+    """Uniform random sample of at most `size` values from a stream of unknown length."""
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.seen = 0
+        self.values = []
+
+    def add(self, value):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            index = self.rng.randrange(self.seen)
+            if index < self.size:
+                self.values[index] = value
+
+    def sample(self):
+        return self.rng.choice(self.values)
+
+
+class GameModel:
+    """Empirical distributions of the raw fields cleanup.py reads, learned from a Steam-format games file.
+
+    Each field is sampled independently from its observed values, except the platform flags, which
+    are sampled as one combination. Missing fields and unparseable release dates are reproduced at
+    their observed rates, so the cleaning step skips the same share of generated games.
+    """
+
+    def __init__(self, sample_size=SAMPLE_SIZE, seed=None):
+        self.rng = random.Random(seed)
+        self.fields = {field: _Reservoir(sample_size, self.rng)
+                       for field in sorted(KEPT_FIELDS) if field not in PLATFORM_FIELDS}
+        self.platforms = _Reservoir(sample_size, self.rng)
+        self.games = 0
+        self.max_game_id = 0
+        self.latest_release = None
+        self.record_bytes = 0
+
+    def fit(self, json_file_path):
+        for game_id, game_data in iter_raw_games(json_file_path):
+            self.games += 1
+            self.max_game_id = max(self.max_game_id, int(game_id))
+            for field, reservoir in self.fields.items():
+                reservoir.add(game_data.get(field, _MISSING))
+            self.platforms.add(tuple(game_data.get(field, _MISSING) for field in PLATFORM_FIELDS))
+
+            release_date = _parse_release_date(game_data.get('release_date'))
+            if release_date and (self.latest_release is None or release_date > self.latest_release):
+                self.latest_release = release_date
+
+        if not self.games:
+            raise ValueError(f"No games found in {json_file_path}")
+        # average size of a source record, skipped fields included
+        self.record_bytes = os.path.getsize(json_file_path) // self.games
+        return self
+
+    def generate(self, rows, jitter_days=JITTER_DAYS, count_spread=COUNT_SPREAD, padding=True):
+        """Yields `rows` synthetic (game_id, game_data) pairs, numbered after the highest source id."""
+
+        for index in range(rows):
+            game_data = {}
+            for field, reservoir in self.fields.items():
+                value = reservoir.sample()
+                if value is _MISSING:
+                    continue
+                if field == 'name' and isinstance(value, str):
+                    value = f'{value} {index + 1}'
+                elif field == 'release_date':
+                    value = self._jitter_release_date(value, jitter_days)
+                elif field in COUNT_FIELDS and isinstance(value, int) and not isinstance(value, bool):
+                    value = round(value * self.rng.lognormvariate(0, count_spread))
+                game_data[field] = value
+
+            for field, value in zip(PLATFORM_FIELDS, self.platforms.sample()):
+                if value is not _MISSING:
+                    game_data[field] = value
+
+            if padding:
+                # make the record as big as an average source record, so parsing costs scale too
+                size = self.record_bytes - len(json.dumps(game_data, indent=4)) - len(PADDING_FIELD) - 16
+                if size > 0:
+                    game_data[PADDING_FIELD] = (PADDING_TEXT * (size // len(PADDING_TEXT) + 1))[:size]
+
+            yield str(self.max_game_id + 1 + index), game_data
+
+    def _jitter_release_date(self, value, jitter_days):
+        release_date = _parse_release_date(value)
+        if release_date is None:
+            return value  # keep empty or invalid dates so cleanup skips them as it would the originals
+        release_date += timedelta(days=self.rng.randint(-jitter_days, jitter_days))
+        return min(release_date, self.latest_release).strftime(RELEASE_DATE_FORMAT)
+
+
+def _parse_release_date(value):
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.strptime(value, RELEASE_DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def write_raw_games(games, output_file_path):
+    """Streams (game_id, game_data) pairs to a Steam-format JSON file, laid out like games.json."""
+
+    with open(output_file_path, 'w', encoding='utf-8') as outfile:
+        outfile.write('{')
+        count = 0
+        for game_id, game_data in games:
+            outfile.write(',\n    ' if count else '\n    ')
+            outfile.write(f'{json.dumps(game_id)}: ' + json.dumps(game_data, indent=4).replace('\n', '\n    '))
+            count += 1
+        outfile.write('\n}' if count else '}')
+    print(f"{count} games written to {output_file_path}")
+
+
+def iter_cleaned(games):
+    for game_id, game_data in games:
+        cleaned_game = clean_game(game_id, game_data)
+        if cleaned_game is not None:
+            yield cleaned_game
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a larger synthetic version of the Steam games dataset.")
+    parser.add_argument('--input', default='dataset/games.json', help="Steam-format file to learn from")
+    parser.add_argument('--output', required=True)
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument('--scale', type=float, help="multiple of the number of games in --input, e.g. 10 or 1000")
+    size.add_argument('--rows', type=int, help="exact number of games to generate")
+    parser.add_argument('--format', choices=('raw', 'cleaned'), default='raw',
+                        help="raw writes Steam-format JSON for cleanup.py; cleaned writes what cleanup.py "
+                             "would produce (.json or .csv) for etl.py")
+    parser.add_argument('--seed', type=int, help="makes the output reproducible")
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE)
+    parser.add_argument('--jitter-days', type=int, default=JITTER_DAYS)
+    parser.add_argument('--no-padding', action='store_true',
+                        help="leave out the filler that matches source record sizes")
+    args = parser.parse_args()
+
+    model = GameModel(sample_size=args.sample_size, seed=args.seed).fit(args.input)
+    rows = args.rows if args.rows is not None else round(model.games * args.scale)
+    games = model.generate(rows, jitter_days=args.jitter_days, padding=not args.no_padding)
+
+    if args.format == 'raw':
+        write_raw_games(games, args.output)
+    else:
+        write_cleaned_data_to_file(iter_cleaned(games), args.output)
@@ -1,42 +1,83 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output, State
+from dash import dcc, html, no_update
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import plotly.graph_objs as go
 import plotly.express as px
+import plotly.io as pio
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.engine.url import URL
-
-engine = create_engine(
-    URL.create(
-        "mysql+mysqlconnector",
-        username="root",
-        password="rootpassword",
-        host="localhost",
-        port=3306,
-        database="steam_games_data_warehouse",
-        query={"connect_timeout": "10"}
-    )
+from dash.exceptions import PreventUpdate
+from flask import Response, g, has_request_context
+
+import metrics
+from approx import ApproximateStore
+from cube import CubeStore
+from etl import PLATFORM_BITS, PRICE_BUCKET_SIZE, PRICE_BUCKET_MAX, platform_masks
+from warehouse import open_warehouse
+
+# WAREHOUSE=mysql (default) reads the MySQL server, WAREHOUSE=embedded the file at WAREHOUSE_PATH
+warehouse = open_warehouse(
+    # callbacks run on concurrent request threads, each checking out its own pooled connection
+    pool_size=int(os.environ.get('DASHBOARD_POOL_SIZE', 10)),
+    max_overflow=int(os.environ.get('DASHBOARD_POOL_MAX_OVERFLOW', 20)),
+    pool_pre_ping=os.environ.get('DASHBOARD_POOL_PRE_PING', '1') != '0',
+    pool_recycle=int(os.environ.get('DASHBOARD_POOL_RECYCLE', 1800)),
 )
 
+# sql answers every callback from the warehouse; cube answers them from an in-memory snapshot of the fact table
+BACKEND = os.environ.get('DASHBOARD_BACKEND', 'sql')
+# with DASHBOARD_APPROXIMATE=1, slice and dice queries on the base tables that miss their deadline are
+# answered from a sample first; the sample is built by the MySQL load, so the embedded warehouse always
+# answers exactly
+APPROXIMATE = os.environ.get('DASHBOARD_APPROXIMATE', '0') == '1' and warehouse.summary_tables
+EXACT_DEADLINE_SECONDS = float(os.environ.get('DASHBOARD_EXACT_DEADLINE_MS', 200)) / 1000
+EXACT_WORKERS = int(os.environ.get('DASHBOARD_EXACT_WORKERS', 2))  # exact queries running in the background at once
+EXACT_POLL_MS = 1000  # how often a page showing an approximate answer asks whether the exact one is in
+# the price slider keeps to the summary table's buckets, so every range is read from there; approximate
+# mode lets it go by the dollar, as ranges off the buckets then have the sample to fall back on
+PRICE_STEP = 1 if APPROXIMATE else PRICE_BUCKET_SIZE
+# how often each process checks etl_batch for a new load, which then empties the query cache
+VERSION_POLL_SECONDS = float(os.environ.get('DASHBOARD_VERSION_POLL_MS', 1000)) / 1000
+
+# every statement below is a constant with %s placeholders, so MySQL sees the same text on every request
 roll_up_query = """
 SELECT 
-    dt.year,
+    fgs.release_year AS year,
     AVG(dg.metacritic_score) AS avg_metacritic_score,
     SUM(fgs.recommendations) AS total_recommendations
 FROM 
     fact_game_sales fgs
 JOIN dim_game dg ON fgs.game_key = dg.game_key
-JOIN dim_time dt ON fgs.time_key = dt.time_key
+WHERE
+    fgs.release_year BETWEEN %s AND %s
 GROUP BY 
-    dt.year
+    fgs.release_year
 ORDER BY 
-    dt.year;
+    fgs.release_year;
+"""
+
+roll_up_aggregate_query = """
+SELECT
+    year,
+    sum_metacritic_score / metacritic_count AS avg_metacritic_score,
+    total_recommendations
+FROM
+    agg_year
+WHERE
+    year BETWEEN %s AND %s
+ORDER BY
+    year;
 """
 
 drill_down_query = """
 SELECT 
-    dt.year,
+    fgs.release_year AS year,
     dt.month,
     COUNT(DISTINCT fgs.game_key) AS games_released,
     AVG(dg.price) AS avg_price
@@ -45,19 +86,35 @@ FROM
 JOIN dim_game dg ON fgs.game_key = dg.game_key
 JOIN dim_time dt ON fgs.time_key = dt.time_key
 WHERE 
-    dt.year = 2022
+    fgs.release_year = %s
 GROUP BY 
-    dt.year, dt.month
+    fgs.release_year, dt.month
 ORDER BY 
     dt.month;
 """
 
-slice_dice_query = """
+drill_down_aggregate_query = """
+SELECT
+    year,
+    month,
+    games_released,
+    sum_price / price_count AS avg_price
+FROM
+    agg_year_month
+WHERE
+    year = %s
+ORDER BY
+    month;
+"""
+
+# the platform is bound as the platform_mask values that have its bit set, an IN list an index can seek
+PLATFORM_MASK_PLACEHOLDERS = ', '.join(['%s'] * len(platform_masks('windows')))
+slice_dice_query = f"""
 SELECT 
     CASE 
-        WHEN dg.price < 10 THEN 'Under $10'
-        WHEN dg.price >= 10 AND dg.price < 30 THEN '$10 - $29.99'
-        ELSE '$30 and above'
+        WHEN dg.price < %s THEN %s
+        WHEN dg.price >= %s AND dg.price < %s THEN %s
+        ELSE %s
     END AS price_range,
     CASE 
         WHEN dg.metacritic_score < 50 THEN 'Low'
@@ -68,46 +125,359 @@ SELECT
 FROM 
     fact_game_sales fgs
 JOIN dim_game dg ON fgs.game_key = dg.game_key
-JOIN dim_platform dp ON fgs.platform_key = dp.platform_key
 WHERE 
-    dp.windows = TRUE
+    fgs.platform_mask IN ({PLATFORM_MASK_PLACEHOLDERS})
 GROUP BY 
     price_range, metacritic_range
 ORDER BY 
     price_range, metacritic_range;
 """
 
+slice_dice_aggregate_query = f"""
+SELECT
+    CASE
+        WHEN price_bucket < %s THEN %s
+        WHEN price_bucket >= %s AND price_bucket < %s THEN %s
+        ELSE %s
+    END AS price_range,
+    metacritic_range,
+    CAST(SUM(game_count) AS SIGNED) AS game_count
+FROM
+    agg_price_metacritic_platform
+WHERE
+    platform_mask IN ({PLATFORM_MASK_PLACEHOLDERS})
+GROUP BY
+    price_range, metacritic_range
+ORDER BY
+    price_range, metacritic_range;
+"""
+
+# one row per year and platform combination; the browser maps each platform_mask to its label
 pivot_query = """
 SELECT 
-    dt.year,
-    SUM(CASE WHEN dp.windows = TRUE AND dp.mac = FALSE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS windows_only,
-    SUM(CASE WHEN dp.windows = FALSE AND dp.mac = TRUE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS mac_only,
-    SUM(CASE WHEN dp.windows = FALSE AND dp.mac = FALSE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS linux_only,
-    SUM(CASE WHEN dp.windows = TRUE AND dp.mac = TRUE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS windows_mac,
-    SUM(CASE WHEN dp.windows = TRUE AND dp.mac = FALSE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS windows_linux,
-    SUM(CASE WHEN dp.windows = FALSE AND dp.mac = TRUE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS mac_linux,
-    SUM(CASE WHEN dp.windows = TRUE AND dp.mac = TRUE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS all_platforms
+    fgs.release_year AS year,
+    fgs.platform_mask,
+    COUNT(*) AS game_count
 FROM 
     fact_game_sales fgs
-JOIN dim_time dt ON fgs.time_key = dt.time_key
-JOIN dim_platform dp ON fgs.platform_key = dp.platform_key
+WHERE
+    fgs.release_year BETWEEN %s AND %s
 GROUP BY 
-    dt.year
+    fgs.release_year, fgs.platform_mask
 ORDER BY 
-    dt.year;
+    fgs.release_year, fgs.platform_mask;
+"""
+
+pivot_aggregate_query = """
+SELECT
+    year,
+    platform_mask,
+    game_count
+FROM
+    agg_platform_year
+WHERE
+    year BETWEEN %s AND %s
+ORDER BY
+    year, platform_mask;
 """
 
-df_roll_up = pd.read_sql(roll_up_query, engine)
-df_drill_down = pd.read_sql(drill_down_query, engine)
-df_slice_dice = pd.read_sql(slice_dice_query, engine)
-df_pivot = pd.read_sql(pivot_query, engine)
+load_version_query = "SELECT MAX(batch_id) AS batch_id FROM etl_batch WHERE finished_at IS NOT NULL"
+
+def slice_dice_params(platform, low, high):
+    """Parameters of the slice and dice statements: the price CASE, labels included, then the platform's masks."""
+    return (low, f'Under ${low}', low, high, f'${low} - ${high}', f'${high} and above', *platform_masks(platform))
+
+def read_prepared(statement, params=()):
+    """Runs one of the statements above on the warehouse and returns a DataFrame.
+
+    On MySQL it runs as a server-side prepared statement, see MySQLWarehouse.execute.
+    """
+    with metrics.phase('sql') as trace:
+        columns, rows = warehouse.execute(statement, params)
+    if trace is not None:
+        trace.rows += len(rows)
+    with metrics.phase('dataframe'):
+        return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+def read_aggregate(aggregate_query, base_query, params):
+    """Reads from a summary table built by the ETL, falling back to the base star join if it can't."""
+    if warehouse.summary_tables:
+        try:
+            return read_prepared(aggregate_query, params)
+        except warehouse.Error:
+            pass
+    return read_prepared(base_query, params)
+
+def load_version():
+    """Returns the latest finished ETL batch, which changes every time new data is loaded.
+
+    Runs on the warehouse directly rather than through read_prepared: the probe isn't part of the
+    callback's query, so it is left out of the sql phase and row counts.
+    """
+    try:
+        _, rows = warehouse.execute(load_version_query)
+    except warehouse.Error:
+        return None
+    batch_id = rows[0][0] if rows else None
+    return None if batch_id is None else int(batch_id)
+
+class LoadVersionPoller:
+    """The latest load version, polled in a background thread so callbacks never wait on the probe.
+
+    Only the first call in a process runs the probe itself; after that callbacks read the last polled
+    value. A poll that fails keeps the last known version, so a database hiccup doesn't empty the caches.
+    """
+
+    def __init__(self, probe, interval=VERSION_POLL_SECONDS):
+        self.probe = probe
+        self.interval = interval
+        self.version = None
+        self._pid = None  # process the poll thread runs in; threads don't survive a fork
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if self._pid != os.getpid():
+            self._start()
+        return self.version
+
+    def poll(self):
+        version = self.probe()
+        if version is not None:
+            self.version = version
+        return self.version
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.poll()
+            threading.Thread(target=self._run, name='load-version-poll', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.poll()
+
+class QueryCache:
+    """Size-bounded LRU cache of query results, emptied whenever a new ETL batch is loaded."""
+
+    def __init__(self, version, maxsize=256):
+        self.current_version = version  # callable returning the current load version
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached result for key, running compute() and caching its result on a miss."""
+        version = self.current_version()
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            trace = metrics.current_trace.get()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if trace is not None:
+                    trace.cache = 'hit'
+                return self._entries[key]
+            self.misses += 1
+            if trace is not None:
+                trace.cache = 'miss'
+
+        result = compute()
+
+        with self._lock:
+            # don't store a result computed while a newer batch was being published
+            if version == self.version:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+
+    def contains(self, key):
+        """Whether key is cached for the current load version, without counting a lookup."""
+        version = self.current_version()
+        with self._lock:
+            return version == self.version and key in self._entries
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                    'maxsize': self.maxsize, 'version': self.version}
+
+# results, the cube and the sample are all kept per load version; callbacks read it from the poller,
+# never the warehouse
+polled_load_version = LoadVersionPoller(load_version)
+query_cache = QueryCache(polled_load_version)
+# with DASHBOARD_CUBE_DIR set, cube snapshots are memory-mapped from there and shared between processes
+cube_store = CubeStore(warehouse, polled_load_version, shared_dir=os.environ.get('DASHBOARD_CUBE_DIR'))
+approximate_store = ApproximateStore(warehouse, polled_load_version)
+
+class ExactInBackground:
+    """Gives an exact query a deadline, answering approximately and finishing it in the background if it misses.
+
+    The exact result lands in the query cache, where the next call for the same key picks it up.
+    """
+
+    def __init__(self, cache, deadline, workers=EXACT_WORKERS):
+        self.cache = cache
+        self.deadline = deadline
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='exact')
+        self.pending = {}  # cache key -> Future of the exact result
+        self._lock = threading.Lock()
+
+    def get(self, key, exact, approximate, poll=False):
+        """Returns (result, approximate). When polling, an exact result that is still running is (None, True)."""
+        if self.cache.contains(key):
+            return self.cache.get_or_compute(key, exact), False
+
+        submitted = False
+        with self._lock:
+            future = self.pending.get(key)
+            if future is None:
+                future = self.pending[key] = self.pool.submit(self.cache.get_or_compute, key, exact)
+                submitted = True
+        if submitted:
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        trace = metrics.current_trace.get()
+        try:
+            result = future.result(timeout=0 if poll else self.deadline)
+        except TimeoutError:
+            pass
+        else:
+            if trace is not None:
+                trace.cache = 'miss'
+            return result, False
+        if trace is not None:
+            trace.cache = 'approximate'
+        if poll:
+            return None, True
+        with metrics.phase('sample'):
+            return approximate(), True
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self.pending.get(key) is future:
+                del self.pending[key]
+
+exact_in_background = ExactInBackground(query_cache, EXACT_DEADLINE_SECONDS, EXACT_WORKERS)
+
+WARMUP_RETRIES = int(os.environ.get('DASHBOARD_WARMUP_RETRIES', 5))
+WARMUP_BACKOFF = 1.0  # seconds before the first retry, doubled after each one
+
+class Warmup:
+    """Runs warm-up tasks concurrently in background threads, retrying each a bounded number of times.
+
+    Nothing here blocks startup: the server answers requests right away, and a callback that comes
+    in before its warm-up is done just computes its result itself.
+    """
+
+    def __init__(self, tasks, retries=WARMUP_RETRIES, backoff=WARMUP_BACKOFF):
+        self.tasks = tasks  # name -> callable
+        self.retries = retries
+        self.backoff = backoff
+        self.status = {name: 'pending' for name in tasks}
+        self.errors = {}
+        self.started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+        for name, task in self.tasks.items():
+            threading.Thread(target=self._run, args=(name, task), name=f'warmup-{name}', daemon=True).start()
+
+    def _run(self, name, task):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                task()
+            except Exception as e:  # most likely the database isn't up yet
+                with self._lock:
+                    self.errors[name] = str(e)
+                if attempt < self.retries:
+                    time.sleep(delay)
+                    delay *= 2
+            else:
+                with self._lock:
+                    self.status[name] = 'ready'
+                    self.errors.pop(name, None)
+                return
+        with self._lock:
+            self.status[name] = 'failed'
+
+    def ready(self):
+        with self._lock:
+            return all(status == 'ready' for status in self.status.values())
+
+    def report(self):
+        with self._lock:
+            return {'ready': all(status == 'ready' for status in self.status.values()),
+                    'tasks': {name: {'status': status, 'error': self.errors.get(name)}
+                              for name, status in self.status.items()}}
+
+# callbacks slower than this, response included, are written to the slow request log
+SLOW_REQUEST_SECONDS = float(os.environ.get('DASHBOARD_SLOW_REQUEST_MS', 500)) / 1000
+if not metrics.slow_log.handlers:
+    slow_log_handler = logging.FileHandler(os.environ.get('DASHBOARD_SLOW_LOG', 'dataset/slow_requests.log'),
+                                           delay=True)
+    slow_log_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    metrics.slow_log.addHandler(slow_log_handler)
+
+def attach_to_request(trace):
+    """Leaves a callback's trace to after_request, which knows the size of the serialized response."""
+    if has_request_context():
+        g.callback_trace = trace
+        return True
+    return False  # warm-up calls have no request, so they are recorded straight away
+
+def instrumented(callback):
+    return metrics.traced(callback, on_trace=attach_to_request, slow_threshold=SLOW_REQUEST_SECONDS)
+
+def triggered_by(component_id):
+    """Whether the running callback was fired by component_id; never true for a direct call like the warm-up."""
+    return has_request_context() and dash.ctx.triggered_id == component_id
 
 external_stylesheets = ['https://cdn.jsdelivr.net/npm/bootstrap@5.2.3/dist/css/bootstrap.min.css']
 
 app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 
+@app.server.after_request
+def record_callback_trace(response):
+    trace = g.pop('callback_trace', None)
+    if trace is not None:
+        if not response.direct_passthrough:
+            trace.response_bytes = response.calculate_content_length()
+        trace.finish(SLOW_REQUEST_SECONDS)
+    return response
+
+@app.server.route('/cache-stats')
+def cache_stats():
+    return query_cache.stats()
+
+@app.server.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.expose(), mimetype='text/plain; version=0.0.4')
+
+@app.server.route('/ready')
+def ready():
+    """Readiness probe: 200 once the warm-up has loaded everything, 503 until then."""
+    report = warmup.report()
+    return report, 200 if report['ready'] else 503
+
 app.layout = html.Div([
     html.H1("Steam Games OLAP Dashboard", className="text-center my-4"),
+    # figures drawn in the browser (assets/dashboard.js) use the same template as the server-side ones
+    dcc.Store(id='figure-template', data=pio.templates[pio.templates.default].to_plotly_json()),
     dcc.Tabs([
         dcc.Tab(label='Roll Up', children=[
             html.Div([
@@ -164,6 +534,7 @@ app.layout = html.Div([
                     ),
                 ], className="col-md-4"),
             ], className="row g-3 mb-3"),
+            dcc.Store(id='drill-down-data'),
             dcc.Graph(id='drill-down-graph')
         ]),
         dcc.Tab(label='Slice and Dice', children=[
@@ -187,12 +558,13 @@ app.layout = html.Div([
                         id='slice-dice-price-range',
                         min=0,
                         max=100,
-                        step=5,
+                        step=PRICE_STEP,
                         marks={i: f"${i}" for i in range(0, 101, 20)},
                         value=[0, 100]
                     ),
                 ], className="col-md-8"),
             ], className="row g-3 mb-3"),
+            dcc.Interval(id='slice-dice-exact-poll', interval=EXACT_POLL_MS, disabled=True),
             dcc.Graph(id='slice-dice-graph')
         ]),
         dcc.Tab(label='Pivot', children=[
@@ -221,6 +593,7 @@ app.layout = html.Div([
                     ),
                 ], className="col-md-4"),
             ], className="row g-3 mb-3"),
+            dcc.Store(id='pivot-data'),
             dcc.Graph(id='pivot-graph')
         ])
     ], className="nav nav-tabs")
@@ -231,6 +604,7 @@ app.layout = html.Div([
     Input('roll-up-year-slider', 'value'),
     Input('roll-up-preset', 'value')
 )
+@instrumented('roll_up')
 def update_roll_up_graph(year_range, preset):
     if preset == 'last_5':
         start_year, end_year = 2018, 2025
@@ -239,138 +613,146 @@ def update_roll_up_graph(year_range, preset):
     else:
         start_year, end_year = year_range
     
-    roll_up_query = f"""
-    SELECT 
-        dt.year,
-        AVG(dg.metacritic_score) AS avg_metacritic_score,
-        SUM(fgs.recommendations) AS total_recommendations
-    FROM 
-        fact_game_sales fgs
-    JOIN dim_game dg ON fgs.game_key = dg.game_key
-    JOIN dim_time dt ON fgs.time_key = dt.time_key
-    WHERE
-        dt.year BETWEEN {start_year} AND {end_year}
-    GROUP BY 
-        dt.year
-    ORDER BY 
-        dt.year;
-    """
-    df_roll_up = pd.read_sql(roll_up_query, engine)
+    if BACKEND == 'cube':
+        with metrics.phase('cube'):
+            df_roll_up = cube_store.get().roll_up(start_year, end_year)
+    else:
+        df_roll_up = query_cache.get_or_compute(('roll_up', int(start_year), int(end_year)),
+                                                lambda: read_aggregate(roll_up_aggregate_query, roll_up_query,
+                                                                       (start_year, end_year)))
     
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df_roll_up['year'], y=df_roll_up['avg_metacritic_score'], name='Avg Metacritic Score'))
-    fig.add_trace(go.Bar(x=df_roll_up['year'], y=df_roll_up['total_recommendations'], name='Total Recommendations'))
-    fig.update_layout(title='Yearly Average Metacritic Score and Total Recommendations', xaxis_title='Year')
+    with metrics.phase('figure'):
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=df_roll_up['year'], y=df_roll_up['avg_metacritic_score'], name='Avg Metacritic Score'))
+        fig.add_trace(go.Bar(x=df_roll_up['year'], y=df_roll_up['total_recommendations'], name='Total Recommendations'))
+        fig.update_layout(title='Yearly Average Metacritic Score and Total Recommendations', xaxis_title='Year')
     return fig
 
+# the metric only picks a column, so the server sends both and the browser draws the one selected
 @app.callback(
-    Output('drill-down-graph', 'figure'),
-    Input('drill-down-year-slider', 'value'),
-    Input('drill-down-metric', 'value')
+    Output('drill-down-data', 'data'),
+    Input('drill-down-year-slider', 'value')
 )
-def update_drill_down_graph(year, metric):
-    drill_down_query = f"""
-    SELECT 
-        dt.year,
-        dt.month,
-        COUNT(DISTINCT fgs.game_key) AS games_released,
-        AVG(dg.price) AS avg_price
-    FROM 
-        fact_game_sales fgs
-    JOIN dim_game dg ON fgs.game_key = dg.game_key
-    JOIN dim_time dt ON fgs.time_key = dt.time_key
-    WHERE 
-        dt.year = {year}
-    GROUP BY 
-        dt.year, dt.month
-    ORDER BY 
-        dt.month;
-    """
-    df_drill_down = pd.read_sql(drill_down_query, engine)
-    
-    fig = go.Figure()
-    if metric == 'games_released':
-        fig.add_trace(go.Bar(x=df_drill_down['month'], y=df_drill_down['games_released'], name='Games Released'))
-        title = f'Monthly Games Released ({year})'
-        y_title = 'Games Released'
+@instrumented('drill_down')
+def update_drill_down_data(year):
+    if BACKEND == 'cube':
+        with metrics.phase('cube'):
+            df_drill_down = cube_store.get().drill_down(year)
     else:
-        fig.add_trace(go.Bar(x=df_drill_down['month'], y=df_drill_down['avg_price'], name='Avg Price'))
-        title = f'Monthly Average Price ({year})'
-        y_title = 'Avg Price'
+        df_drill_down = query_cache.get_or_compute(('drill_down', int(year)), lambda: read_aggregate(
+            drill_down_aggregate_query, drill_down_query, (year,)))
     
-    fig.update_layout(title=title, xaxis_title='Month', yaxis_title=y_title)
-    return fig
+    return {
+        'year': year,
+        'month': df_drill_down['month'].tolist(),
+        'games_released': df_drill_down['games_released'].tolist(),
+        'avg_price': df_drill_down['avg_price'].tolist(),
+    }
 
+app.clientside_callback(
+    ClientsideFunction(namespace='olap', function_name='drill_down_figure'),
+    Output('drill-down-graph', 'figure'),
+    Input('drill-down-data', 'data'),
+    Input('drill-down-metric', 'value'),
+    State('figure-template', 'data')
+)
+
+# ranges off the summary table's buckets (see PRICE_STEP) run on the base tables; in approximate mode those
+# answer from the sample if they miss the deadline, and turn on the poll, which re-runs the callback until
+# the exact answer is in
 @app.callback(
     Output('slice-dice-graph', 'figure'),
+    Output('slice-dice-exact-poll', 'disabled'),
     Input('slice-dice-platform', 'value'),
-    Input('slice-dice-price-range', 'value')
+    Input('slice-dice-price-range', 'value'),
+    Input('slice-dice-exact-poll', 'n_intervals')
 )
-def update_slice_dice_graph(platform, price_range):
-    slice_dice_query = f"""
-    SELECT 
-        CASE 
-            WHEN dg.price < {price_range[0]} THEN 'Under ${price_range[0]}'
-            WHEN dg.price >= {price_range[0]} AND dg.price < {price_range[1]} THEN '${price_range[0]} - ${price_range[1]}'
-            ELSE '${price_range[1]} and above'
-        END AS price_range,
-        CASE 
-            WHEN dg.metacritic_score < 50 THEN 'Low'
-            WHEN dg.metacritic_score >= 50 AND dg.metacritic_score < 75 THEN 'Medium'
-            ELSE 'High'
-        END AS metacritic_range,
-        COUNT(*) AS game_count
-    FROM 
-        fact_game_sales fgs
-    JOIN dim_game dg ON fgs.game_key = dg.game_key
-    JOIN dim_platform dp ON fgs.platform_key = dp.platform_key
-    WHERE 
-        dp.{platform} = TRUE
-    GROUP BY 
-        price_range, metacritic_range
-    ORDER BY 
-        price_range, metacritic_range;
-    """
-    df_slice_dice = pd.read_sql(slice_dice_query, engine)
+@instrumented('slice_dice')
+def update_slice_dice_graph(platform, price_range, n_intervals):
+    if platform not in PLATFORM_BITS:
+        raise PreventUpdate
+    low, high = price_range
+    params = slice_dice_params(platform, low, high)
+    cache_key = ('slice_dice', platform, low, high)
+    approximate = False
+    if BACKEND == 'cube':
+        with metrics.phase('cube'):
+            df_slice_dice = cube_store.get().slice_dice(platform, price_range)
+    elif all(bound % PRICE_BUCKET_SIZE == 0 and 0 <= bound <= PRICE_BUCKET_MAX for bound in price_range):
+        df_slice_dice = query_cache.get_or_compute(cache_key, lambda: read_aggregate(
+            slice_dice_aggregate_query, slice_dice_query, params))
+    elif APPROXIMATE:
+        df_slice_dice, approximate = exact_in_background.get(
+            cache_key, lambda: read_prepared(slice_dice_query, params),
+            lambda: approximate_store.get().slice_dice(platform, price_range),
+            poll=triggered_by('slice-dice-exact-poll'))
+        if df_slice_dice is None:
+            return no_update, False
+    else:
+        df_slice_dice = query_cache.get_or_compute(cache_key, lambda: read_prepared(slice_dice_query, params))
     
-    fig = px.treemap(df_slice_dice, path=['price_range', 'metacritic_range'], values='game_count')
-    fig.update_layout(title=f'Game Count by Price Range and Metacritic Score ({platform.capitalize()} Games)')
-    return fig
+    with metrics.phase('figure'):
+        fig = px.treemap(df_slice_dice, path=['price_range', 'metacritic_range'], values='game_count')
+        title = f'Game Count by Price Range and Metacritic Score ({platform.capitalize()} Games)'
+        if approximate:
+            # error bounds on the leaves; the exact counts replace the figure once they are in
+            errors = {f'{row.price_range}/{row.metacritic_range}': row.game_count_error
+                      for row in df_slice_dice.itertuples()}
+            fig.update_traces(text=[f'± {errors[node]:,.0f}' if node in errors else '' for node in fig.data[0].ids],
+                              texttemplate='%{label}<br>%{value} %{text}')
+            title += ' - approximate, 95% error bounds'
+        fig.update_layout(title=title)
+    return fig, not approximate
 
+# the view only changes the bar mode, so switching it is left to the browser
 @app.callback(
+    Output('pivot-data', 'data'),
+    Input('pivot-year-slider', 'value')
+)
+@instrumented('pivot')
+def update_pivot_data(year_range):
+    if BACKEND == 'cube':
+        with metrics.phase('cube'):
+            df_pivot = cube_store.get().pivot(year_range[0], year_range[1])
+    else:
+        df_pivot = query_cache.get_or_compute(('pivot', int(year_range[0]), int(year_range[1])),
+                                              lambda: read_aggregate(pivot_aggregate_query, pivot_query,
+                                                                     (year_range[0], year_range[1])))
+    
+    return {
+        'year': df_pivot['year'].tolist(),
+        'platform_mask': df_pivot['platform_mask'].tolist(),
+        'game_count': df_pivot['game_count'].tolist(),
+        'platforms': PLATFORM_BITS,
+    }
+
+app.clientside_callback(
+    ClientsideFunction(namespace='olap', function_name='pivot_figure'),
     Output('pivot-graph', 'figure'),
-    Input('pivot-year-slider', 'value'),
-    Input('pivot-view', 'value')
+    Input('pivot-data', 'data'),
+    Input('pivot-view', 'value'),
+    State('figure-template', 'data')
 )
-def update_pivot_graph(year_range, view):
-    pivot_query = f"""
-    SELECT 
-        dt.year,
-        SUM(CASE WHEN dp.windows = TRUE AND dp.mac = FALSE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS windows_only,
-        SUM(CASE WHEN dp.windows = FALSE AND dp.mac = TRUE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS mac_only,
-        SUM(CASE WHEN dp.windows = FALSE AND dp.mac = FALSE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS linux_only,
-        SUM(CASE WHEN dp.windows = TRUE AND dp.mac = TRUE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS windows_mac,
-        SUM(CASE WHEN dp.windows = TRUE AND dp.mac = FALSE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS windows_linux,
-        SUM(CASE WHEN dp.windows = FALSE AND dp.mac = TRUE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS mac_linux,
-        SUM(CASE WHEN dp.windows = TRUE AND dp.mac = TRUE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS all_platforms
-    FROM 
-        fact_game_sales fgs
-    JOIN dim_time dt ON fgs.time_key = dt.time_key
-    JOIN dim_platform dp ON fgs.platform_key = dp.platform_key
-    WHERE
-        dt.year BETWEEN {year_range[0]} AND {year_range[1]}
-    GROUP BY 
-        dt.year
-    ORDER BY 
-        dt.year;
+
+# the first page load fires every callback with the layout's initial values, so warm those up
+warmup = Warmup({
+    'roll_up': lambda: update_roll_up_graph([2010, 2026], 'all_time'),
+    'drill_down': lambda: update_drill_down_data(2025),
+    'slice_dice': lambda: update_slice_dice_graph('windows', [0, 100], None),
+    'pivot': lambda: update_pivot_data([2010, 2025]),
+})
+
+def create_app():
+    """WSGI app factory for a pre-forking server, see gunicorn.conf.py.
+
+    Runs no queries, so the parent and every worker start in milliseconds. Each worker starts its
+    own warm-up after the fork (threads don't survive one); with DASHBOARD_CUBE_DIR set, the first
+    worker to build the cube snapshot publishes it there and the others memory-map it.
     """
-    df_pivot = pd.read_sql(pivot_query, engine)
-    
-    fig = go.Figure()
-    for column in df_pivot.columns[1:]:  # Skip the 'year' column
-        fig.add_trace(go.Bar(x=df_pivot['year'], y=df_pivot[column], name=column))
-    fig.update_layout(title='Games Released by Platform Combination', xaxis_title='Year', yaxis_title='Number of Games', barmode=view)
-    return fig
+    # pooled connections must not cross a fork; each worker opens its own after post_fork
+    warehouse.dispose()
+    return app.server
 
 if __name__ == '__main__':
+    warmup.start()
     app.run_server(debug=True)
@@ -1,48 +1,32 @@
-import mysql.connector
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import threading
 import time
+from datetime import datetime
 
-# Connect to MySQL database
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="rootpassword",
-    database="steam_games_data_warehouse"
-)
-
-def run_test_case(query, description, expected_output_type=None):
-    start_time = time.time()
-    cursor = db.cursor()
-    try:
-      cursor.execute(query)
-      if expected_output_type == "count": # check if single count
-          results = cursor.fetchone()[0] # fetch single count value
-      else:
-          results = cursor.fetchall()
-    except Exception as e:
-      results = f"Error: {e}"
-    end_time = time.time()
-    execution_time = end_time - start_time
-
-
-    return execution_time, results
-
+from etl import PLATFORM_BITS, platform_masks
+from metrics import percentile
+from warehouse import EMBEDDED_PATH, WAREHOUSES, open_warehouse
 
 # test cases
 test_cases = [
     {"description": "Roll Up - Average Metacritic Score and Total Recommendations by Year",
      "query": """
         SELECT 
-            dt.year,
+            fgs.release_year AS year,
             AVG(dg.metacritic_score) AS avg_metacritic_score,
             SUM(fgs.recommendations) AS total_recommendations
         FROM 
             fact_game_sales fgs
         JOIN dim_game dg ON fgs.game_key = dg.game_key
-        JOIN dim_time dt ON fgs.time_key = dt.time_key
         GROUP BY 
-            dt.year
+            fgs.release_year
         ORDER BY 
-            dt.year;
+            fgs.release_year;
      """,
       "expected_output_type": None
     },
@@ -57,7 +41,7 @@ test_cases = [
         JOIN dim_game dg ON fgs.game_key = dg.game_key
         JOIN dim_time dt ON fgs.time_key = dt.time_key
         WHERE 
-            dt.year = {year}  -- Filter for a specific year
+            fgs.release_year = {year}  -- Filter for a specific year
         GROUP BY 
             dt.month  -- Group by month
         ORDER BY 
@@ -84,37 +68,30 @@ test_cases = [
         FROM 
             fact_game_sales fgs
         JOIN dim_game dg ON fgs.game_key = dg.game_key
-        JOIN dim_platform dp ON fgs.platform_key = dp.platform_key
         WHERE 
-            dp.{platform} = TRUE  -- Slicing by platform
+            fgs.platform_mask IN ({platform_masks})  -- Slicing by platform
         GROUP BY 
             price_range, metacritic_range  -- Dicing
         ORDER BY 
             price_range, metacritic_range;
      """,
       "expected_output_type": None,
-      "parameters": [{"platform": "windows"}, {"platform": "mac"}, {"platform": "linux"}]
+      "parameters": [{"platform": platform, "platform_masks": ', '.join(map(str, platform_masks(platform)))}
+                     for platform in PLATFORM_BITS]
 
     },
     {"description": "Pivot - Number of Games Released per Platform Combination by Year",
      "query": """
         SELECT 
-            dt.year,
-            SUM(CASE WHEN dp.windows = TRUE AND dp.mac = FALSE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS windows_only,
-            SUM(CASE WHEN dp.windows = FALSE AND dp.mac = TRUE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS mac_only,
-            SUM(CASE WHEN dp.windows = FALSE AND dp.mac = FALSE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS linux_only,
-            SUM(CASE WHEN dp.windows = TRUE AND dp.mac = TRUE AND dp.linux = FALSE THEN 1 ELSE 0 END) AS windows_mac,
-            SUM(CASE WHEN dp.windows = TRUE AND dp.mac = FALSE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS windows_linux,
-            SUM(CASE WHEN dp.windows = FALSE AND dp.mac = TRUE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS mac_linux,
-            SUM(CASE WHEN dp.windows = TRUE AND dp.mac = TRUE AND dp.linux = TRUE THEN 1 ELSE 0 END) AS all_platforms
+            fgs.release_year AS year,
+            fgs.platform_mask,  -- Pivoted into one column per platform combination by the dashboard
+            COUNT(*) AS game_count
         FROM 
             fact_game_sales fgs
-        JOIN dim_time dt ON fgs.time_key = dt.time_key
-        JOIN dim_platform dp ON fgs.platform_key = dp.platform_key
         GROUP BY 
-            dt.year
+            fgs.release_year, fgs.platform_mask
         ORDER BY 
-            dt.year;
+            fgs.release_year, fgs.platform_mask;
      """,
       "expected_output_type": None
 
@@ -122,51 +99,194 @@ test_cases = [
     },
 ]
 
-# execute tests and record results (multiple runs)
-num_runs = 3  # number of test runs
-test_results = []
-
-for test_case in test_cases:
-    if "parameters" in test_case:  # parameterized query
-        for params in test_case["parameters"]:
-            execution_times = []
-            if isinstance(params, dict):
-                query = test_case["query"].format(**params)
-                description = test_case["description"].format(**params)  # format description
+
+def expand_test_cases(test_cases):
+    """Yields (description, query) for every test case, once per parameter set."""
+    for test_case in test_cases:
+        for params in test_case.get("parameters", [None]):
+            if params is None:  # non-parameterized query
+                yield test_case["description"], test_case["query"]
+            elif isinstance(params, dict):
+                yield test_case["description"].format(**params), test_case["query"].format(**params)
             else:  # other param types
-                query = test_case["query"].format(year=params)
-                description = test_case["description"].format(year=params) # format year param
-
-
-            for _ in range(num_runs):
-                execution_time, _ = run_test_case(query, description)
-                execution_times.append(execution_time)
-            avg_execution_time = sum(execution_times) / num_runs
-            test_results.append({
-                "test_case": {"description": description},  # store formatted description
-                "execution_times": execution_times,
-                "avg_execution_time": avg_execution_time
-            })
-    else:  # non-parameterized query
-        execution_times = []
-        for _ in range(num_runs):
-            execution_time, _ = run_test_case(test_case["query"], test_case["description"])
-            execution_times.append(execution_time)
-        avg_execution_time = sum(execution_times) / num_runs
-        test_results.append({
-            "test_case": test_case,  # no formatting
-            "execution_times": execution_times,
-            "avg_execution_time": avg_execution_time
+                yield test_case["description"].format(year=params), test_case["query"].format(year=params)
+
+
+def run_query(db, query):
+    """Runs a query and fetches every row, returning the wall time and the rows."""
+    cursor = db.cursor()
+    start_time = time.perf_counter()
+    cursor.execute(query)
+    results = cursor.fetchall()
+    execution_time = time.perf_counter() - start_time
+    cursor.close()
+    return execution_time, results
+
+
+def result_digest(results):
+    """Fingerprint of a result set, used to check that every run returned the same rows."""
+    return hashlib.sha1(repr(results).encode()).hexdigest()
+
+
+def explain_analyze(warehouse, db, query):
+    """Returns the EXPLAIN ANALYZE plan of a query, with actual row counts and timings per step."""
+    cursor = db.cursor()
+    try:
+        cursor.execute(f"{warehouse.explain_statement} {query.strip().rstrip(';')}")
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except warehouse.Error as e:
+        return f"Error: {e}"
+    finally:
+        cursor.close()
+
+
+def benchmark(warehouse, description, query, warmup, iterations, concurrency):
+    """Times a query on `concurrency` connections at once, each doing warmup runs and then timed runs."""
+    connections = [warehouse.connect() for _ in range(concurrency)]
+    timings = [[] for _ in range(concurrency)]
+    spans = [None] * concurrency
+    digests = set()
+    row_counts = set()
+    errors = []
+    # timed runs start together, so the concurrent mode really measures contention
+    start_line = threading.Barrier(concurrency)
+
+    def worker(index):
+        db = connections[index]
+        try:
+            for _ in range(warmup):
+                run_query(db, query)
+            start_line.wait()
+            started = time.perf_counter()
+            for _ in range(iterations):
+                execution_time, results = run_query(db, query)
+                timings[index].append(execution_time)
+                digests.add(result_digest(results))
+                row_counts.add(len(results))
+            spans[index] = (started, time.perf_counter())
+        except threading.BrokenBarrierError:
+            pass  # another connection failed
+        except warehouse.Error as e:
+            errors.append(str(e))
+            start_line.abort()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = {"description": description, "concurrency": concurrency, "warmup": warmup, "iterations": iterations}
+    samples = [execution_time for worker_timings in timings for execution_time in worker_timings]
+    if errors or not samples:
+        result["error"] = errors[0] if errors else "no timed runs"
+    else:
+        wall_time = max(end for _, end in spans) - min(start for start, _ in spans)
+        result.update({
+            "rows": row_counts.pop() if len(row_counts) == 1 else sorted(row_counts),
+            "result_digest": digests.pop() if len(digests) == 1 else sorted(digests),
+            "consistent": len(digests) <= 1,
+            "mean": statistics.mean(samples),
+            "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "min": min(samples),
+            "max": max(samples),
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "throughput_qps": len(samples) / wall_time if wall_time > 0 else None,
         })
 
-# write execution times to the file
-with open("dataset/test_results.txt", "w") as f:
+    for db in connections:
+        db.close()
+    return result
+
+
+def compare_to_baseline(results, baseline, metric, threshold):
+    """Annotates results with their change against a baseline run and returns the ones that regressed.
+
+    A query regresses when its metric grew by more than threshold, a fraction of the baseline value.
+    """
+    previous = {(result["description"], result["concurrency"]): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["description"], result["concurrency"]))
+        if before is None or before.get(metric) is None or result.get(metric) is None:
+            continue
+        result["baseline"] = before[metric]
+        result["change"] = result[metric] / before[metric] - 1 if before[metric] else 0.0
+        if result["change"] > threshold:
+            regressions.append(result)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard queries against the data warehouse.")
+    parser.add_argument('--warehouse', choices=WAREHOUSES, default=os.environ.get('WAREHOUSE', 'mysql'),
+                        help="compare engines on the same data by saving a baseline on one and passing it "
+                             "as --baseline on the other")
+    parser.add_argument('--warehouse-path', default=os.environ.get('WAREHOUSE_PATH', EMBEDDED_PATH),
+                        help="embedded warehouse file, as built by etl.py --warehouse embedded")
+    parser.add_argument('--warmup', type=int, default=2, help="untimed runs per connection before timing")
+    parser.add_argument('--iterations', type=int, default=20, help="timed runs per connection")
+    parser.add_argument('--concurrency', type=int, default=1, help="connections running each query at once")
+    parser.add_argument('--explain', action='store_true', help="capture EXPLAIN ANALYZE for every query")
+    parser.add_argument('--output', default='dataset/test_results.json')
+    parser.add_argument('--baseline', help="earlier --output file to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write this run to the --baseline file")
+    parser.add_argument('--metric', choices=('mean', 'p50', 'p95', 'p99'), default='p50',
+                        help="timing compared against the baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="fail when the metric is this fraction slower than the baseline")
+    args = parser.parse_args()
+
+    warehouse = open_warehouse(args.warehouse, args.warehouse_path)
+    test_results = []
+    for description, query in expand_test_cases(test_cases):
+        result = benchmark(warehouse, description, query, args.warmup, args.iterations, args.concurrency)
+        if args.explain:
+            db = warehouse.connect()
+            result["explain_analyze"] = explain_analyze(warehouse, db, query)
+            db.close()
+        test_results.append(result)
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "settings": {"warehouse": args.warehouse, "warmup": args.warmup, "iterations": args.iterations,
+                     "concurrency": args.concurrency},
+        "results": test_results,
+    }
+
+    regressions = []
+    if args.baseline and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(test_results, baseline, args.metric, args.threshold)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    failed = False
     for result in test_results:
-        f.write(f"Test Case: {result['test_case']['description']}\n")
-        for i, execution_time in enumerate(result['execution_times']):
-             f.write(f"Run {i+1} Execution Time: {execution_time:.4f} seconds\n")
-        f.write(f"Average Execution Time: {result['avg_execution_time']:.4f} seconds\n")
-        f.write("-" * 20 + "\n")  # separator between test cases
-
-db.close()
-print("Test results written to test_results.txt")
\ No newline at end of file
+        if "error" in result:
+            failed = True
+            print(f"ERROR      {result['description']}: {result['error']}")
+            continue
+        line = (f"p50 {result['p50'] * 1000:8.2f} ms  p95 {result['p95'] * 1000:8.2f} ms  "
+                f"p99 {result['p99'] * 1000:8.2f} ms  {result['throughput_qps']:8.1f} q/s  {result['description']}")
+        if "change" in result:
+            line += f"  ({result['change']:+.1%} {args.metric} vs baseline)"
+        if not result["consistent"]:
+            failed = True
+            line += "  INCONSISTENT RESULTS"
+        print(line)
+
+    for result in regressions:
+        failed = True
+        print(f"REGRESSION {result['description']}: {args.metric} {result['baseline'] * 1000:.2f} ms -> "
+              f"{result[args.metric] * 1000:.2f} ms ({result['change']:+.1%}, threshold {args.threshold:.0%})")
+
+    print(f"Test results written to {args.output}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,16 @@
+import os
+import sys
+
+# the modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def cleaned_game(game_id, **fields):
+    """A record as cleanup.py writes it, with fields overriding the defaults."""
+    game = {'game_id': game_id, 'name': f'Game {game_id}', 'release_date': '2025-03-14', 'required_age': 0,
+            'price': 9.99, 'windows': True, 'mac': False, 'linux': True, 'metacritic_score': 70,
+            'achievements': 10, 'recommendations': 100, 'positive': 80, 'negative': 20,
+            'estimated_owners_min': 0, 'estimated_owners_max': 20000, 'average_playtime_forever': 60,
+            'peak_ccu': 5}
+    game.update(fields)
+    return game
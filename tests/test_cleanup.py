@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+import cleanup
+
+RAW_GAME = {'name': 'Game', 'release_date': 'Mar 14, 2025', 'required_age': 0, 'price': 9.99,
+            'windows': True, 'mac': False, 'linux': True, 'metacritic_score': 70, 'achievements': 10,
+            'recommendations': 100, 'positive': 80, 'negative': 20, 'estimated_owners': '0 - 20000',
+            'average_playtime_forever': 60, 'peak_ccu': 5}
+
+
+def clean_python(raw_games):
+    return [game for game in (cleanup.clean_game(game_id, data) for game_id, data in raw_games) if game]
+
+
+@pytest.mark.parametrize('field, value, error', [
+    ('required_age', '1.5', ValueError),
+    ('peak_ccu', 'many', ValueError),
+    ('price', 'free', ValueError),
+    ('achievements', None, TypeError),
+])
+def test_engines_reject_the_same_bad_number(field, value, error):
+    raw_games = [('1', RAW_GAME), ('2', dict(RAW_GAME, **{field: value}))]
+    with pytest.raises(error):
+        clean_python(raw_games)
+    with pytest.raises(error):
+        cleanup.clean_games_columnar(raw_games)
+
+
+def test_engines_convert_numbers_alike():
+    raw_games = [('1', RAW_GAME), ('2', dict(RAW_GAME, required_age='3', price=5, peak_ccu=2.0))]
+    assert cleanup.clean_games_columnar(raw_games) == clean_python(raw_games)
+
+
+def test_compare_engines_agrees_on_a_bad_file(tmp_path):
+    path = tmp_path / 'games.json'
+    path.write_text(json.dumps({'1': RAW_GAME, '2': dict(RAW_GAME, required_age='1.5')}))
+    assert cleanup.compare_engines(str(path)) == {}
@@ -0,0 +1,29 @@
+import multiprocessing
+
+import metrics
+
+
+def _worker(directory, observations):
+    metrics.share(directory, interval=3600)
+    for _ in range(observations):
+        metrics.callback_seconds.observe(0.02, 'share_test')
+        metrics.cache_lookups.inc('share_test', 'hit')
+    metrics.save()
+
+
+def test_expose_adds_up_every_process_sharing_the_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'shared_dir', None)
+    monkeypatch.setattr(metrics, 'shared_name', None)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_worker, args=(str(tmp_path), count)) for count in (2, 3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    metrics.share(str(tmp_path), interval=3600)
+    metrics.cache_lookups.inc('share_test', 'hit')
+    exposed = metrics.expose()
+    assert 'dashboard_callback_cache_total{callback="share_test",result="hit"} 6' in exposed
+    assert 'dashboard_callback_seconds_count{callback="share_test"} 5' in exposed
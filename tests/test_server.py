@@ -0,0 +1,31 @@
+import os
+import tempfile
+import time
+
+from conftest import cleaned_game
+from etl import embedded_etl_process
+
+# server.py opens its warehouse on import, so one is built and named before it is imported
+WAREHOUSE_DIR = tempfile.mkdtemp()
+WAREHOUSE_PATH = os.path.join(WAREHOUSE_DIR, 'warehouse.sqlite')
+embedded_etl_process(WAREHOUSE_PATH, [
+    cleaned_game(1),
+    cleaned_game(2, release_date='2020-06-01', price=24.99, mac=True),
+    cleaned_game(3, release_date='2012-11-30', price=0.0, windows=False),
+])
+os.environ.update(WAREHOUSE='embedded', WAREHOUSE_PATH=WAREHOUSE_PATH,
+                  DASHBOARD_SLOW_LOG=os.path.join(WAREHOUSE_DIR, 'slow_requests.log'))
+
+import server  # noqa: E402
+
+
+def test_ready_once_warmup_finishes():
+    client = server.app.server.test_client()
+    server.warmup.start()
+    deadline = time.monotonic() + 30
+    response = client.get('/ready')
+    while response.status_code != 200 and time.monotonic() < deadline:
+        time.sleep(0.1)
+        response = client.get('/ready')
+    assert response.status_code == 200, response.get_json()
+    assert all(task['status'] == 'ready' for task in response.get_json()['tasks'].values())
@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import threading
+
+import mysql.connector
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.engine.url import URL
+
+try:
+    import duckdb
+except ImportError:  # only needed for .duckdb files; .sqlite files use the sqlite3 module
+    duckdb = None
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "rootpassword",
+    "database": "steam_games_data_warehouse"
+}
+
+# mysql is the Docker MySQL server; embedded is a single file built by etl.py --warehouse embedded
+WAREHOUSES = ('mysql', 'embedded')
+EMBEDDED_PATH = 'dataset/warehouse.duckdb'
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+
+
+class MySQLWarehouse:
+    """The data warehouse in MySQL, read through a SQLAlchemy connection pool.
+
+    The dashboard statements are written for it: %s placeholders and the summary tables built by etl.py.
+    """
+
+    name = 'mysql'
+    Error = mysql.connector.Error
+    summary_tables = True
+    explain_statement = 'EXPLAIN ANALYZE'
+
+    def __init__(self, config=DB_CONFIG, **pool_options):
+        self.config = config
+        self.engine = create_engine(
+            URL.create(
+                "mysql+mysqlconnector",
+                username=config['user'],
+                password=config['password'],
+                host=config['host'],
+                port=config.get('port', 3306),
+                database=config['database'],
+                query={"connect_timeout": "10"}
+            ),
+            **pool_options,
+        )
+
+    def connect(self):
+        """A new connection of its own, outside the pool."""
+        return mysql.connector.connect(**self.config)
+
+    def execute(self, statement, params=()):
+        """Runs a statement as a server-side prepared statement and returns (columns, rows).
+
+        Each pooled connection prepares a statement the first time it runs it and keeps the cursor, so
+        later calls on that connection only send the parameters.
+        """
+        connection = self.engine.raw_connection()
+        try:
+            # info lives as long as the DBAPI connection, so a recycled connection prepares again
+            cursors = connection.info.setdefault('prepared_cursors', {})
+            cursor = cursors.get(statement)
+            if cursor is None:
+                cursor = cursors[statement] = connection.dbapi_connection.cursor(prepared=True)
+            try:
+                cursor.execute(statement, params)
+                rows = cursor.fetchall()
+            except mysql.connector.Error:
+                del cursors[statement]
+                raise
+            return [column[0] for column in cursor.description], rows
+        finally:
+            connection.close()  # back to the pool, which rolls back so the next read sees fresh data
+
+    def read_frame(self, query):
+        return pd.read_sql(query, self.engine)
+
+    def dispose(self, close=True):
+        """Drops the pooled connections, e.g. after a fork."""
+        self.engine.dispose(close=close)
+
+
+class EmbeddedWarehouse:
+    """The data warehouse as a single file opened in-process: no server, no network round trips.
+
+    A .duckdb file is read with DuckDB, a columnar engine; a .sqlite file with the sqlite3 module,
+    for machines without DuckDB. Statements are the MySQL ones, with %s placeholders turned into ?.
+    There are no summary tables, so every query runs on the star schema.
+
+    etl.py replaces the file whole on every load; each thread keeps its own read-only connection and
+    reopens it when it sees a new file, on a DuckDB instance of its own so it reads the new file
+    even while other threads still have the old one open.
+    """
+
+    name = 'embedded'
+    summary_tables = False
+
+    def __init__(self, path=EMBEDDED_PATH):
+        self.path = path
+        self.columnar = not path.endswith(SQLITE_SUFFIXES)
+        if self.columnar and duckdb is None:
+            raise ImportError(f"DuckDB is needed to open {path}: pip install duckdb, or use a .sqlite file")
+        self.Error = duckdb.Error if self.columnar else sqlite3.Error
+        # sqlite has no EXPLAIN ANALYZE; its plan is the closest thing
+        self.explain_statement = 'EXPLAIN ANALYZE' if self.columnar else 'EXPLAIN QUERY PLAN'
+        self._local = threading.local()
+
+    def connect(self, path=None, read_only=True):
+        path = path or self.path
+        if self.columnar:
+            if not read_only:
+                return duckdb.connect(path)
+            # duckdb.connect hands back the process's open instance of a path, old file and all, so a
+            # reader attaches the file to an in-memory instance of its own, which opens whatever is there
+            # now; views rather than USE, as USE does not carry over to the connection's cursors
+            quoted_path = path.replace("'", "''")
+            db = duckdb.connect(':memory:')
+            db.execute(f"ATTACH '{quoted_path}' AS file (READ_ONLY)")
+            for (table,) in db.execute("SELECT table_name FROM duckdb_tables() WHERE database_name = 'file'").fetchall():
+                db.execute(f"CREATE VIEW {table} AS SELECT * FROM file.{table}")
+            return db
+        if read_only:
+            return sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        return sqlite3.connect(path, check_same_thread=False)
+
+    def _connection(self):
+        try:
+            file_id = os.stat(self.path).st_ino
+        except OSError as e:
+            raise self.Error(f"Embedded warehouse {self.path} not found: {e}") from e
+        if getattr(self._local, 'file_id', None) != file_id:
+            if getattr(self._local, 'connection', None) is not None:
+                self._local.connection.close()
+            self._local.connection = self.connect()
+            self._local.file_id = file_id
+        return self._local.connection
+
+    def execute(self, statement, params=()):
+        """Runs a statement on this thread's connection and returns (columns, rows)."""
+        cursor = self._connection().cursor()
+        try:
+            cursor.execute(statement.replace('%s', '?'), params)
+            rows = cursor.fetchall()
+            return [column[0] for column in cursor.description], rows
+        finally:
+            cursor.close()
+
+    def read_frame(self, query):
+        columns, rows = self.execute(query)
+        return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+    def write_frame(self, db, table, frame):
+        """Appends a DataFrame to a table in one bulk insert, missing values as NULL."""
+        if self.columnar:
+            # nullable dtypes, so DuckDB reads missing numbers as NULL rather than NaN
+            db.register('frame', frame.convert_dtypes())
+            db.execute(f"INSERT INTO {table} ({', '.join(frame.columns)}) SELECT * FROM frame")
+            db.unregister('frame')
+        else:
+            rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+            placeholders = ', '.join(['?'] * len(frame.columns))
+            db.executemany(f"INSERT INTO {table} ({', '.join(frame.columns)}) VALUES ({placeholders})", rows)
+
+    def dispose(self, close=True):
+        """Forgets this thread's connection; the others reopen theirs on their next query after a fork."""
+        if close and getattr(self._local, 'connection', None) is not None:
+            self._local.connection.close()
+        self._local = threading.local()
+
+
+def open_warehouse(name=None, path=None, **pool_options):
+    """The warehouse named by name, or by the WAREHOUSE environment variable (mysql by default).
+
+    The embedded file is path, or WAREHOUSE_PATH, or EMBEDDED_PATH; pool_options go to MySQL's pool.
+    """
+    name = name or os.environ.get('WAREHOUSE', 'mysql')
+    if name == 'mysql':
+        return MySQLWarehouse(**pool_options)
+    if name == 'embedded':
+        return EmbeddedWarehouse(path or os.environ.get('WAREHOUSE_PATH', EMBEDDED_PATH))
+    raise ValueError(f"Unknown warehouse '{name}'. Use one of {WAREHOUSES}")